@@ -0,0 +1,63 @@
+"""
+Маршрутизация запросов между основной БД и репликами.
+
+Чтения моделей приложений из ROUTED_APPS распределяются по репликам, записи идут в default.
+Чтения возвращаются в default, пока поток находится в транзакции основной БД или
+пока действует pin_primary (после записи клиента, см. ReplicaPinningMiddleware, и в фоновых задачах).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_APPS = {'materials', 'users'}
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def pin_primary():
+    """Все чтения внутри блока идут в основную БД"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Чтения - на случайную реплику, записи и миграции - в основную БД"""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if (
+            not self.replicas
+            or model._meta.app_label not in ROUTED_APPS
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит из основной БД через репликацию
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,149 @@
+"""
+Быстрый read-only путь сериализации списков.
+
+Строки берутся из QuerySet.values(), а вывод строится заранее скомпилированными конвертерами
+по полям обычного DRF-сериализатора, без создания экземпляров моделей. Результат совпадает
+с выводом DRF побайтно; если сериализатор содержит неподдерживаемое поле, используется обычный путь.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField as ModelFileField
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .thumbnails import ThumbnailsField
+
+
+class UnsupportedField(Exception):
+    """Поле не может быть сериализовано из values()"""
+
+
+def _identity(value):
+    return value
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if not value:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _file_converter(field, model_field):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    storage = model_field.storage
+    request = field.context.get('request')
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+class ValuesSerializer:
+    """Сериализация строк values() по полям DRF-сериализатора"""
+
+    def __init__(self, serializer, annotations=()):
+        model = serializer.Meta.model
+        self.columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.columns.append((name, *self._compile(model, name, field, set(annotations))))
+
+    @classmethod
+    def for_serializer(cls, serializer, annotations=()):
+        """Скомпилированный сериализатор или None, если нужен обычный путь"""
+        try:
+            return cls(serializer, annotations)
+        except UnsupportedField:
+            return None
+
+    def _compile(self, model, name, field, annotations):
+        """Возвращает (ключ в values(), конвертер) для поля"""
+        if isinstance(field, serializers.SerializerMethodField):
+            # Методы поддерживаются, только если значение уже посчитано аннотацией
+            if name in annotations:
+                return name, _identity
+            raise UnsupportedField(name)
+        if isinstance(field, serializers.BaseSerializer) or field.source == '*' or '.' in field.source:
+            raise UnsupportedField(name)
+
+        source = field.source
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            if source in annotations:
+                return source, _identity
+            raise UnsupportedField(name)
+        if not model_field.concrete:
+            raise UnsupportedField(name)
+
+        if isinstance(field, ThumbnailsField):
+            return source, field.urls_for_name
+        if isinstance(field, serializers.FileField):
+            if not isinstance(model_field, ModelFileField):
+                raise UnsupportedField(name)
+            return source, _file_converter(field, model_field)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if not field.use_pk_only_optimization() or field.pk_field is not None:
+                raise UnsupportedField(name)
+            return source, _identity
+        if isinstance(field, serializers.DateTimeField):
+            return source, _datetime_converter(field)
+        if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+            # Значения из БД уже имеют нужный тип
+            return source, _identity
+        if isinstance(field, (serializers.BooleanField, serializers.ReadOnlyField)):
+            return source, field.to_representation
+        raise UnsupportedField(name)
+
+    @property
+    def value_names(self):
+        return list(dict.fromkeys(key for _, key, _ in self.columns))
+
+    def to_representation(self, rows):
+        columns = self.columns
+        return [
+            {name: None if row[key] is None else convert(row[key]) for name, key, convert in columns}
+            for row in rows
+        ]
+
+
+class FastListMixin:
+    """Быстрый путь для list-представлений: values() и ValuesSerializer вместо экземпляров моделей"""
+
+    def get_values_serializer(self, queryset):
+        if not settings.FAST_LIST_SERIALIZATION or queryset._prefetch_related_lookups:
+            return None
+        return ValuesSerializer.for_serializer(self.get_serializer(), queryset.query.annotations)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.get_values_serializer(queryset)
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        # Поля сортировки нужны курсорной пагинации для построения позиции
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        ordering = [ordering] if isinstance(ordering, str) else ordering
+        names = values_serializer.value_names + [name.lstrip('-') for name in ordering]
+        rows = queryset.values(*dict.fromkeys(names))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.to_representation(page))
+        return Response(values_serializer.to_representation(rows))
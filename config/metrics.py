@@ -0,0 +1,143 @@
+"""
+Метрики запросов внутри процесса и их выдача в текстовом формате Prometheus.
+
+Гистограммы накапливаются в памяти каждого процесса; при нескольких воркерах
+Prometheus опрашивает каждый из них отдельно (или суммирует по instance).
+Приложения могут добавить свои значения через register_collector.
+"""
+import hmac
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин и метками"""
+
+    def __init__(self, name, documentation, buckets, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+LABELS = ('view', 'method', 'status')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Wall time of the request in the Django process.', DURATION_BUCKETS, LABELS,
+)
+db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL queries per request.', DURATION_BUCKETS, LABELS,
+)
+db_queries = Histogram(
+    'http_request_db_queries', 'Number of SQL queries per request.', QUERY_BUCKETS, LABELS,
+)
+response_size = Histogram(
+    'http_response_size_bytes', 'Size of non-streaming response bodies.', SIZE_BUCKETS, LABELS,
+)
+HISTOGRAMS = (request_duration, db_duration, db_queries, response_size)
+
+_collectors = []
+
+
+def register_collector(collector):
+    """
+    Регистрирует функцию, возвращающую дополнительные метрики
+    в виде кортежей (имя, тип, описание, значение)
+    """
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def observe_request(view, method, status, duration, db_time, queries, size=None):
+    labels = (view, method, str(status))
+    request_duration.observe(duration, *labels)
+    db_duration.observe(db_time, *labels)
+    db_queries.observe(queries, *labels)
+    if size is not None:
+        response_size.observe(size, *labels)
+
+
+def render():
+    """Все метрики процесса в текстовом формате Prometheus"""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for collector in _collectors:
+        for name, kind, documentation, value in collector():
+            lines.extend((f'# HELP {name} {documentation}', f'# TYPE {name} {kind}', f'{name} {value}'))
+    return '\n'.join(lines) + '\n'
+
+
+def client_ip(request):
+    """
+    Адрес клиента с учетом METRICS_TRUSTED_PROXIES: за доверенным прокси берется самый правый
+    адрес X-Forwarded-For, не принадлежащий доверенным прокси (левые значения клиент может подделать)
+    """
+    trusted = settings.METRICS_TRUSTED_PROXIES
+    address = request.META.get('REMOTE_ADDR')
+    if address not in trusted:
+        return address
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    for address in reversed(forwarded):
+        if address not in trusted:
+            return address
+    return address
+
+
+def _has_token(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        return False
+    expected = f'Bearer {token}'.encode()
+    return hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected)
+
+
+def metrics_view(request):
+    """
+    Эндпоинт для Prometheus; доступ с адресов METRICS_ALLOWED_IPS (пустой список закрывает его)
+    или с заголовком Authorization: Bearer <METRICS_TOKEN>
+    """
+    allowed = settings.METRICS_ALLOWED_IPS
+    if not _has_token(request) and '*' not in allowed and client_ip(request) not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
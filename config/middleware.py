@@ -0,0 +1,150 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from config import metrics
+from config.db_router import pin_primary, replica_aliases
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current_stats = ContextVar('request_db_stats', default=None)
+
+
+class QueryStats:
+    """Число и суммарное время SQL-запросов текущего запроса"""
+
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Постоянная обертка выполнения запросов на соединении. Вне запроса она ничего не делает,
+    а статистику берет из contextvar, поэтому работает и для ORM в потоках async-представлений
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class PerformanceMiddleware:
+    """
+    Время запроса, время и число SQL-запросов, размер ответа: заголовок Server-Timing
+    и гистограммы config.metrics по имени представления. Ставится первым в MIDDLEWARE
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.SERVER_TIMING_HEADER
+        # Соединения, открытые до загрузки middleware, сигнал connection_created уже пропустили
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        metrics.observe_request(
+            view, request.method, response.status_code, duration, stats.db_time, stats.queries, size,
+        )
+        if self.server_timing:
+            # Для потоковых ответов время покрывает только формирование ответа, без отдачи тела
+            response.headers['Server-Timing'] = (
+                f'app;dur={duration * 1000:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Чтение своих записей при работе с репликами: изменяющие запросы и запросы в течение
+    REPLICA_PIN_SECONDS после них (по cookie) читают только из основной БД
+    """
+
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'db_primary_pin'
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_pin(request):
+            return self.get_response(request)
+        with pin_primary():
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        if not self.should_pin(request):
+            return await self.get_response(request)
+        with pin_primary():
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def should_pin(self, request):
+        return request.method not in SAFE_METHODS or self.cookie_name in request.COOKIES
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,113 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная (keyset) пагинация по (created_at, id) без COUNT(*) и OFFSET"""
+
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class EmailKeysetPagination(KeysetPagination):
+    """Курсорная пагинация пользователей по уникальному email"""
+
+    ordering = ('email',)
+
+
+class AsyncKeysetPagination:
+    """Keyset-пагинация по (-created_at, -id) для асинхронных представлений"""
+
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = CursorPagination.invalid_cursor_message
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET.get(self.page_size_query_param, settings.REST_FRAMEWORK['PAGE_SIZE']))
+        except ValueError:
+            page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Позиция (created_at, id) последней записи предыдущей страницы, None для первой страницы"""
+        cursor = request.GET.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            created_at, pk = urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            # Как и CursorPagination: испорченный курсор - ошибка клиента, а не первая страница
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        return urlsafe_b64encode(f'{obj.created_at.isoformat()}|{obj.pk}'.encode()).decode()
+
+    async def paginate_queryset(self, request, queryset):
+        """Возвращает (объекты страницы, URL следующей страницы или None)"""
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by('-created_at', '-id')
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        objects = [obj async for obj in queryset[:page_size + 1]]
+        if len(objects) <= page_size:
+            return objects, None
+        objects = objects[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(objects[-1])
+        )
+        return objects, next_url
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для админки больших таблиц: точный COUNT(*) только до ADMIN_EXACT_COUNT_LIMIT строк,
+    для больших выборок - оценка по статистике БД (число страниц приблизительное)
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list.order_by()
+        # COUNT по подзапросу с LIMIT читает не больше limit + 1 строк
+        bounded = queryset[:limit + 1].count()
+        if bounded <= limit:
+            return bounded
+        estimate = self.estimate(queryset)
+        if estimate is None:
+            # Оценки нет (фильтры в SQLite и других СУБД без EXPLAIN-оценки) - только точный подсчет
+            return queryset.count()
+        return max(estimate, bounded)
+
+    @staticmethod
+    def estimate(queryset):
+        """Оценка числа строк: план запроса в PostgreSQL, максимальный id без фильтров в остальных СУБД"""
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        if not queryset.query.where:
+            return queryset.aggregate(last_id=Max('pk'))['last_id']
+        return None
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.PerformanceMiddleware',
+    'config.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,25 +76,78 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database
-# Для начала используем SQLite для простоты
-DATABASES = {
-    'default': {
+# База данных задается переменными окружения: DB_ENGINE=sqlite (по умолчанию) или postgresql.
+# DB_REPLICAS - список реплик через запятую: хосты для PostgreSQL или файлы для SQLite
+# (локально файлы-реплики можно получить копированием db.sqlite3)
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_REPLICAS = [replica for replica in os.getenv('DB_REPLICAS', '').split(',') if replica]
+
+if DB_ENGINE == 'postgresql':
+    _primary_database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', 'lms_db'),
+        'USER': os.getenv('DB_USER', 'lms_user'),
+        'PASSWORD': os.getenv('DB_PASSWORD', 'lms_password'),
+        'HOST': os.getenv('DB_HOST', 'localhost'),
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    _replica_key = 'HOST'
+else:
+    _primary_database = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
     }
+    _replica_key = 'NAME'
+
+DATABASES = {'default': _primary_database}
+for _number, _replica in enumerate(DB_REPLICAS, start=1):
+    # В тестах реплики указывают на тестовую копию основной БД
+    DATABASES[f'replica{_number}'] = {**_primary_database, _replica_key: _replica, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+# Сколько секунд после записи чтения клиента идут в основную БД (чтобы он видел свои изменения)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# По умолчанию локальная память процесса; бэкенд можно заменить через переменные окружения
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'lms-default'),
+    },
+    # Счетчики лимитов запросов (config.throttling); лимиты общие на все воркеры только в Redis/Memcached,
+    # manage.py check --deploy отклоняет кэш локальной памяти (users.checks)
+    'throttle': {
+        'BACKEND': os.getenv('THROTTLE_CACHE_BACKEND', os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', os.getenv('CACHE_LOCATION', 'lms-throttle')),
+        'KEY_PREFIX': 'throttle',
+    },
 }
 
-# Для PostgreSQL раскомментируйте ниже
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv('DB_NAME', 'lms_db'),
-#         'USER': os.getenv('DB_USER', 'lms_user'),
-#         'PASSWORD': os.getenv('DB_PASSWORD', 'lms_password'),
-#         'HOST': os.getenv('DB_HOST', 'localhost'),
-#         'PORT': os.getenv('DB_PORT', '5432'),
-#     }
-# }
+# Кэш сериализованных курсов и уроков (инвалидируется сигналами materials)
+MATERIALS_CACHE_ALIAS = os.getenv('MATERIALS_CACHE_ALIAS', 'default')
+MATERIALS_CACHE_TIMEOUT = int(os.getenv('MATERIALS_CACHE_TIMEOUT', 60 * 60))
+
+# Пакетные операции с уроками
+MATERIALS_BULK_MAX_ITEMS = int(os.getenv('MATERIALS_BULK_MAX_ITEMS', 1000))
+MATERIALS_BULK_BATCH_SIZE = int(os.getenv('MATERIALS_BULK_BATCH_SIZE', 500))
+
+# Размер порции при потоковой выгрузке каталога
+MATERIALS_EXPORT_CHUNK_SIZE = int(os.getenv('MATERIALS_EXPORT_CHUNK_SIZE', 500))
+
+# Удаление курсов: пометка и фоновое удаление уроков порциями (materials.deletion)
+MATERIALS_ASYNC_DELETE = os.getenv('MATERIALS_ASYNC_DELETE', 'True') == 'True'
+MATERIALS_DELETE_CHUNK_SIZE = int(os.getenv('MATERIALS_DELETE_CHUNK_SIZE', 500))
+
+# Лента изменений для синхронизации клиентов (materials.changes): размер страницы,
+# окно задержки для транзакций, зафиксированных позже, и срок хранения записей об удалениях
+CHANGE_FEED_PAGE_SIZE = int(os.getenv('CHANGE_FEED_PAGE_SIZE', 100))
+CHANGE_FEED_MAX_PAGE_SIZE = int(os.getenv('CHANGE_FEED_MAX_PAGE_SIZE', 1000))
+CHANGE_FEED_LAG_SECONDS = int(os.getenv('CHANGE_FEED_LAG_SECONDS', 5))
+CHANGE_FEED_TOMBSTONE_DAYS = int(os.getenv('CHANGE_FEED_TOMBSTONE_DAYS', 30))
 
 
 # Password validation
@@ -127,6 +182,38 @@ STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Хеширование загружаемых файлов по частям для контентно-адресуемого хранилища (config.storage)
+FILE_UPLOAD_HANDLERS = [
+    'config.storage.HashingMemoryFileUploadHandler',
+    'config.storage.HashingTemporaryFileUploadHandler',
+]
+
+# Миниатюры изображений: имя размера -> (ширина, высота)
+THUMBNAIL_SIZES = {
+    'small': (160, 160),
+    'medium': (480, 270),
+}
+THUMBNAIL_FORMAT = os.getenv('THUMBNAIL_FORMAT', 'WEBP')  # WEBP или JPEG
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', 80))
+
+# Фоновые задачи (пул потоков внутри процесса)
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 4))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+
+# Метрики запросов (config.middleware, эндпоинт /metrics)
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True') == 'True'
+# /metrics доступен только с перечисленных адресов (по умолчанию с локальной машины), '*' - всем
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+# Адреса обратных прокси: за ними адрес клиента берется из X-Forwarded-For, иначе REMOTE_ADDR - это сам прокси
+METRICS_TRUSTED_PROXIES = [
+    ip.strip() for ip in os.getenv('METRICS_TRUSTED_PROXIES', '').split(',') if ip.strip()
+]
+# Альтернатива списку адресов: Prometheus передает Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Прогрев приложения при загрузке config.wsgi (config.warmup)
+WSGI_WARMUP = os.getenv('WSGI_WARMUP', 'True') == 'True'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -136,12 +223,50 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',  # Temporarily for development
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
 }
 
+# Лимиты дорогих действий: rate и burst - token bucket на клиента (429),
+# concurrency - одновременные запросы на все воркеры (503)
+THROTTLE_CACHE_ALIAS = 'throttle'
+THROTTLE_SCOPES = {
+    'course_detail': {
+        'rate': os.getenv('THROTTLE_COURSE_DETAIL_RATE', '20/s'),
+        'burst': 40,
+        'concurrency': int(os.getenv('THROTTLE_COURSE_DETAIL_CONCURRENCY', 16)),
+    },
+    'password': {
+        'rate': os.getenv('THROTTLE_PASSWORD_RATE', '5/min'),
+        'burst': 5,
+        'concurrency': int(os.getenv('THROTTLE_PASSWORD_CONCURRENCY', 4)),
+    },
+}
+
+# Админка: до скольких строк считать точный COUNT(*) (config.pagination.EstimatedCountPaginator)
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', 10000))
+
+# Быстрая сериализация списков из values() (config.fastpath)
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
 # Custom user model
-AUTH_USER_MODEL = 'users.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'users.User'
+
+# Сессии и пользователь сессии читаются из кэша (users.cache), БД - только при промахе
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    # Сессии, созданные до перехода на кэш, остаются действительными до повторного входа
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Сброс кэша при изменении пользователя должны видеть все воркеры: в production нужен общий кэш
+# (Redis/Memcached), manage.py check --deploy отклоняет кэш локальной памяти (users.checks)
+USER_CACHE_ALIAS = os.getenv('USER_CACHE_ALIAS', 'default')
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', 15 * 60))
+
+# Срок жизни токенов API
+AUTH_TOKEN_MAX_AGE = int(os.getenv('AUTH_TOKEN_MAX_AGE', 7 * 24 * 60 * 60))
\ No newline at end of file
@@ -0,0 +1,80 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer
+
+
+def _parse_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class DynamicFieldsSerializerMixin:
+    """Сериализатор, принимающий аргумент fields - набор полей, которые нужно оставить"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Поддержка ?fields=a,b и ?expand=<поле> для запросов на чтение: ограничивает поля ответа
+    и колонки SQL (only()), чтобы неиспользуемые данные не загружались из БД.
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    expandable_fields = ()
+
+    def get_requested_fields(self):
+        """Запрошенные поля или None, если ограничения нет"""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(self.fields_query_param)
+        return _parse_list(value) if value else None
+
+    def get_expanded_fields(self):
+        """Запрошенные вложенные представления из числа разрешенных"""
+        value = self.request.query_params.get(self.expand_query_param, '')
+        return _parse_list(value) & set(self.expandable_fields)
+
+    def is_field_requested(self, name):
+        fields = self.get_requested_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_columns(self, serializer_class):
+        """Колонки модели, необходимые запрошенным полям (None - все колонки)"""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return None
+
+        model = serializer_class.Meta.model
+        columns = {model._meta.pk.name}
+        for field in serializer_class(fields=fields).fields.values():
+            # Вложенные сериализаторы загружаются через prefetch_related
+            if isinstance(field, BaseSerializer) or field.source == '*':
+                continue
+            try:
+                model_field = model._meta.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete:
+                columns.add(model_field.name)
+
+        # Поля сортировки нужны курсорной пагинации
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        columns.update(name.lstrip('-') for name in ([ordering] if isinstance(ordering, str) else ordering))
+        return columns
+
+    def apply_sparse_columns(self, queryset, serializer_class=None):
+        """Ограничивает выборку колонками, нужными запрошенным полям"""
+        columns = self.get_sparse_columns(serializer_class or self.get_serializer_class())
+        return queryset.only(*columns) if columns else queryset
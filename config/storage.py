@@ -0,0 +1,137 @@
+"""
+Контентно-адресуемое хранилище медиафайлов.
+
+Файл сохраняется под именем <каталог upload_to>/<2 символа хеша>/<sha256><расширение>,
+поэтому одинаковые загрузки занимают одно место на диске и один URL в CDN, а повторная запись
+пропускается. Хеш считается обработчиками загрузки по мере поступления частей файла.
+Содержимое по такому URL никогда не меняется, поэтому его можно кэшировать навсегда:
+serve_media (режим DEBUG) и веб-сервер в production отдают Cache-Control immutable.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.utils.deconstruct import deconstructible
+from django.views.static import serve
+
+HASH_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[\w]+)?$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# umask процесса читается один раз при импорте: os.umask меняет его для всех потоков
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def content_hash(content):
+    """sha256 содержимого: готовый из обработчика загрузки или потоково по частям файла"""
+    digest = getattr(content, 'content_hash', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def is_content_addressed(name):
+    return bool(HASH_NAME_RE.search(name))
+
+
+@deconstructible(path='config.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище MEDIA_ROOT с именами по хешу содержимого и без повторной записи дубликатов"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = content_hash(content)
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(posixpath.dirname(name), digest[:2], digest + extension)
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым: существующий файл с этим именем и есть нужный файл
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        # Запись во временный файл и атомарная замена: читатели не видят недописанный файл,
+        # а параллельная загрузка того же содержимого заменяет файл идентичным
+        fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in content.chunks():
+                    output.write(chunk)
+            # mkstemp создает файл с правами 0600, выставляем те же права, что и FileSystemStorage
+            os.chmod(temporary_path, self.file_permissions_mode or 0o666 & ~UMASK)
+            os.replace(temporary_path, full_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.unlink(temporary_path)
+            raise
+        return name
+
+
+class HashingUploadMixin:
+    """Считает sha256 загружаемого файла по частям и сохраняет его в атрибуте content_hash файла"""
+
+    def new_file(self, *args, **kwargs):
+        # Хешер создается до вызова родителя: MemoryFileUploadHandler прерывает цепочку исключением
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.stores_file():
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+    def stores_file(self):
+        return True
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    def stores_file(self):
+        # Большие файлы этот обработчик передает дальше, их хеширует временный обработчик
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def serve_media(request, path):
+    """Отдача медиафайлов в режиме DEBUG; файлы с хешем в имени кэшируются клиентом навсегда"""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_content_addressed(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
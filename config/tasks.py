@@ -0,0 +1,45 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from config.db_router import pin_primary
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул фоновых потоков процесса (создается лениво, чтобы не мешать fork при preload)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='lms-background',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        # Задача запускается сразу после фиксации и должна видеть только что записанные данные
+        with pin_primary():
+            func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        # Соединения с БД потоко-локальны, закрываем открытые этим потоком
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Выполняет функцию в фоновом пуле после фиксации текущей транзакции"""
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, func, args, kwargs))
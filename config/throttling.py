@@ -0,0 +1,134 @@
+"""
+Ограничения для дорогих действий: token bucket на клиента (429) и число одновременных запросов (503).
+
+Области и их лимиты задаются в settings.THROTTLE_SCOPES, представления связывают с ними действия
+через throttle_scopes. Состояние хранится в кэше THROTTLE_CACHE_ALIAS, поэтому общий кэш
+(Redis, Memcached) делит счетчики между воркерами; locmem ограничивает каждый процесс отдельно.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# Сколько живет счетчик занятых слотов после последнего занятия: ограничивает утечку слотов,
+# если воркер упал посреди запроса
+SLOT_TTL = 60
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many concurrent requests, try again later.')
+    default_code = 'overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # Обработчик исключений DRF выставит по этому атрибуту заголовок Retry-After
+        self.wait = wait
+
+
+def _get_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def parse_rate(rate):
+    """'10/s', '5/min' -> (число запросов, период в секундах)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_scope(view):
+    """Область лимитов для текущего действия представления (или None)"""
+    action = getattr(view, 'action', None) or view.request.method.lower()
+    scope = getattr(view, 'throttle_scopes', {}).get(action)
+    return scope, settings.THROTTLE_SCOPES.get(scope) if scope else None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket на клиента в виде GCRA: в кэше хранится одно число - теоретическое время прибытия.
+    Чтение и запись не атомарны, как и у встроенных троттлов DRF: при гонке может пройти лишний запрос
+    """
+
+    def allow_request(self, request, view):
+        scope, config = get_scope(view)
+        if not config or 'rate' not in config:
+            return True
+        count, period = parse_rate(config['rate'])
+        interval = period / count
+        tolerance = interval * (config.get('burst', count) - 1)
+
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        key = f'bucket:{scope}:{ident}'
+        cache = _get_cache()
+        now = time.time()
+        arrival = max(cache.get(key, now), now)
+        if arrival - now > tolerance:
+            self._wait = arrival - now - tolerance
+            return False
+        arrival += interval
+        cache.set(key, arrival, math.ceil(arrival - now) + 1)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class ConcurrencyThrottle(BaseThrottle):
+    """
+    Не больше N одновременных запросов области на все воркеры (атомарные incr/decr кэша).
+    Слот освобождается при закрытии ответа, см. ScopedThrottlingMixin
+    """
+
+    def allow_request(self, request, view):
+        scope, config = get_scope(view)
+        if not config or 'concurrency' not in config:
+            return True
+        key = f'concurrency:{scope}'
+        cache = _get_cache()
+        cache.add(key, 0, SLOT_TTL)
+        try:
+            current = cache.incr(key)
+        except ValueError:
+            # Счетчик истек между add и incr
+            cache.add(key, 0, SLOT_TTL)
+            current = cache.incr(key)
+        # Срок продлевается при каждом занятии слота: иначе счетчик истек бы под идущими запросами,
+        # и их освобождение после повторного add увело бы его ниже нуля
+        cache.touch(key, SLOT_TTL)
+        if current > config['concurrency']:
+            cache.decr(key)
+            raise ServiceOverloaded(wait=config.get('retry_after', 1))
+        request._throttle_slots = [*getattr(request, '_throttle_slots', ()), key]
+        return True
+
+
+def release_slot(key):
+    cache = _get_cache()
+    try:
+        current = cache.decr(key)
+    except ValueError:
+        return
+    if current < 0:
+        # Счетчик все же истек и создан заново, пока запрос выполнялся: возвращаем его к нулю
+        cache.incr(key, -current)
+
+
+class ScopedThrottlingMixin:
+    """Лимиты THROTTLE_SCOPES для действий из throttle_scopes ({действие или метод: область})"""
+
+    throttle_classes = [TokenBucketThrottle, ConcurrencyThrottle]
+    throttle_scopes = {}
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Слоты освобождаются после отдачи ответа, в том числе потокового
+        for key in getattr(request, '_throttle_slots', ()):
+            response._resource_closers.append(lambda key=key: release_slot(key))
+        request._throttle_slots = []
+        return response
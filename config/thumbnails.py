@@ -0,0 +1,86 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from .tasks import run_in_background
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def thumbnail_name(name, size):
+    """Имя файла миниатюры: <каталог>/thumbs/<имя>_<размер>.<расширение>"""
+    root = posixpath.splitext(name)[0]
+    directory, filename = posixpath.split(root)
+    extension = EXTENSIONS[settings.THUMBNAIL_FORMAT]
+    return posixpath.join(directory, 'thumbs', f'{filename}_{size}.{extension}')
+
+
+def thumbnail_urls(name):
+    """URL всех миниатюр изображения по имени исходного файла или None, если изображения нет"""
+    if not name:
+        return None
+    return {size: default_storage.url(thumbnail_name(name, size)) for size in settings.THUMBNAIL_SIZES}
+
+
+def generate_thumbnails(name, source_storage=None, force=False):
+    """
+    Создает миниатюры изображения; уже существующие пропускаются, если не задан force.
+    Исходный файл читается из хранилища его поля, а миниатюры, как и в thumbnail_urls и delete_thumbnails,
+    всегда лежат в default_storage: хранилище по хешу содержимого переименовало бы их при записи
+    """
+    source_storage = source_storage or default_storage
+    targets = {size: thumbnail_name(name, size) for size in settings.THUMBNAIL_SIZES}
+    if not force and all(default_storage.exists(target) for target in targets.values()):
+        return []
+
+    with source_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if settings.THUMBNAIL_FORMAT == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+
+    for size, target in targets.items():
+        thumbnail = ImageOps.fit(image, settings.THUMBNAIL_SIZES[size], Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        thumbnail.save(buffer, settings.THUMBNAIL_FORMAT, quality=settings.THUMBNAIL_QUALITY)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+    return list(targets.values())
+
+
+def delete_thumbnails(name):
+    """Удаляет все миниатюры изображения"""
+    for size in settings.THUMBNAIL_SIZES:
+        default_storage.delete(thumbnail_name(name, size))
+
+
+def schedule_thumbnails(field_file):
+    """Ставит создание миниатюр в фоновый пул, не задерживая запрос на загрузку"""
+    if field_file:
+        run_in_background(generate_thumbnails, field_file.name, field_file.storage)
+
+
+class ThumbnailsField(serializers.Field):
+    """URL миниатюр изображения (только для чтения)"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return self.urls_for_name(value.name if value else None)
+
+    def urls_for_name(self, name):
+        """URL миниатюр по имени файла (используется и быстрым путем сериализации)"""
+        urls = thumbnail_urls(name)
+        request = self.context.get('request')
+        if urls is None or request is None:
+            return urls
+        return {size: request.build_absolute_uri(url) for size, url in urls.items()}
@@ -0,0 +1,149 @@
+"""
+Прогрев приложения до приема запросов.
+
+Вызывается из config.wsgi при загрузке приложения. С preload_app (gunicorn.conf.py) прогрев выполняется
+один раз в мастер-процессе до fork, и воркеры получают импортированные модули, разобранные URL,
+поля сериализаторов и каталоги переводов готовыми, а не на первом запросе после деплоя.
+Соединения с БД и кэшами в конце закрываются: сокет, унаследованный несколькими воркерами, ломает протокол.
+"""
+import logging
+import time
+from importlib import import_module
+from importlib.util import find_spec
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+logger = logging.getLogger(__name__)
+
+# Модули приложений, которые иначе импортируются только на первом запросе
+APP_MODULES = ('views', 'serializers', 'admin', 'urls', 'signals')
+
+
+def import_app_modules():
+    """Импорт представлений, сериализаторов и админки всех приложений проекта"""
+    for app_config in apps.get_app_configs():
+        for name in APP_MODULES:
+            module_name = f'{app_config.name}.{name}'
+            if find_spec(module_name) is not None:
+                import_module(module_name)
+
+
+def _walk_patterns(resolver):
+    for pattern in resolver.url_patterns:
+        # Регулярные выражения путей компилируются лениво, при первом сопоставлении
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            yield from _walk_patterns(pattern)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def resolve_urls():
+    """Разбор всех URL-шаблонов и таблиц reverse() по всем пространствам имен; возвращает число путей"""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    pending = [resolver]
+    while pending:
+        current = pending.pop()
+        for _, (_, nested) in current.namespace_dict.items():
+            nested.reverse_dict
+            pending.append(nested)
+    return sum(1 for _ in _walk_patterns(resolver))
+
+
+def _project_serializers(base=BaseSerializer):
+    """Сериализаторы, объявленные в приложениях проекта (а не в Django и DRF)"""
+    project_apps = tuple(f'{app_config.name}.' for app_config in apps.get_app_configs()
+                         if app_config.path.startswith(str(settings.BASE_DIR)))
+    seen = set()
+    pending = [base]
+    while pending:
+        for subclass in pending.pop().__subclasses__():
+            if subclass not in seen:
+                seen.add(subclass)
+                pending.append(subclass)
+    return [cls for cls in seen if cls.__module__.startswith(project_apps)]
+
+
+def build_serializer_fields():
+    """
+    Построение полей всех сериализаторов проекта: интроспекция моделей DRF, валидаторы полей
+    и ленивые регулярные выражения валидаторов; возвращает число сериализаторов
+    """
+    count = 0
+    for serializer_class in _project_serializers():
+        if issubclass(serializer_class, ListSerializer):
+            continue
+        try:
+            serializer = serializer_class(context={})
+            for field in serializer.fields.values():
+                field.validators
+        except Exception:
+            # Прогрев не должен мешать запуску: сериализатор, которому нужен контекст запроса, прогреется сам
+            logger.debug('Warm-up skipped serializer %s', serializer_class.__name__, exc_info=True)
+            continue
+        count += 1
+    return count
+
+
+def prime_models():
+    """Кэши связей моделей (_meta.get_fields) и настройка ORM"""
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def prime_connections():
+    """
+    Проверка соединений с БД и кэшами: ошибки конфигурации видны при запуске, а не на первом запросе,
+    и кэшируются версия сервера и возможности БД. Соединения затем закрываются до fork
+    """
+    try:
+        for alias in connections:
+            connection = connections[alias]
+            connection.ensure_connection()
+            connection.features.supports_transactions
+        for alias in settings.CACHES:
+            caches[alias].get('warmup')
+    finally:
+        # Закрываются и при ошибке: иначе открытое до сбоя соединение унаследуют все воркеры
+        connections.close_all()
+        caches.close_all()
+
+
+def load_translations():
+    """Загрузка каталогов переводов языка по умолчанию"""
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('Not found.')
+    translation.deactivate()
+
+
+STEPS = (
+    ('modules', import_app_modules),
+    ('models', prime_models),
+    ('urls', resolve_urls),
+    ('serializers', build_serializer_fields),
+    ('translations', load_translations),
+    ('connections', prime_connections),
+)
+
+
+def warm_up():
+    """Выполняет все шаги прогрева; возвращает {шаг: секунды}"""
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+        timings[name] = time.perf_counter() - started
+    logger.info('Warm-up finished in %.3fs: %s', sum(timings.values()), ', '.join(
+        f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()
+    ))
+    return timings
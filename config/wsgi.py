@@ -0,0 +1,20 @@
+"""
+WSGI config for config project.
+
+Запуск: gunicorn config.wsgi (настройки в gunicorn.conf.py). Приложение прогревается при загрузке
+модуля (config.warmup), с preload_app - один раз в мастер-процессе до fork воркеров.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_wsgi_application()
+
+if settings.WSGI_WARMUP:
+    from config.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,27 @@
+"""
+Настройки gunicorn: gunicorn config.wsgi
+
+С preload_app приложение импортируется и прогревается (config.warmup) в мастер-процессе до fork,
+воркеры получают готовые модули через copy-on-write и не платят за холодный старт на первом запросе.
+Чтобы fork был безопасен, прогрев закрывает соединения с БД и кэшами,
+а пул фоновых задач (config.tasks) создается лениво уже в воркере.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# Перезапуск воркеров ограничивает рост памяти; разброс не дает всем воркерам перезапуститься разом
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    # Загруженные при прогреве объекты живут весь срок процесса: убираем их из поля зрения сборщика мусора,
+    # иначе его обходы в воркерах трогают счетчики ссылок и копируют разделяемые страницы памяти
+    gc.freeze()
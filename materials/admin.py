@@ -1,7 +1,55 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from django.utils.translation import gettext_lazy as _
+
+from config.pagination import EstimatedCountPaginator
+from . import counters, deletion, search
 from .models import Course, Lesson
 
 
+class AutocompleteListFilter(admin.FieldListFilter):
+    """Фильтр по внешнему ключу с автодополнением вместо списка всех связанных объектов"""
+
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        value = params.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Виджет поля формы: выбранный объект подгружается одним запросом по id
+        self.widget = field.formfield(widget=AutocompleteSelect(field, model_admin.admin_site), required=False).widget
+        self.widget_id = f'autocomplete_filter_{field_path}'
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        # Адрес без параметра фильтра; шаблон добавляет к нему выбранное значение
+        self.base_query_string = changelist.get_query_string(remove=[self.lookup_kwarg])
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': self.base_query_string,
+            'display': _('All'),
+        }
+
+    def rendered_widget(self):
+        return self.widget.render(self.lookup_kwarg, self.lookup_val, attrs={'id': self.widget_id})
+
+
+class IndexedSearchMixin:
+    """Поиск в админке по полнотекстовому индексу materials.search; без индекса - обычный search_fields"""
+
+    def get_search_results(self, request, queryset, search_term):
+        subquery = search.matching_ids(search_term, self.model) if search_term else None
+        if subquery is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=RawSQL(*subquery)), False
+
+
 class LessonInline(admin.TabularInline):
     """Inline для уроков в админке курса"""
 
@@ -10,18 +58,58 @@ class LessonInline(admin.TabularInline):
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Админ-панель для курсов"""
 
-    list_display = ('title', 'created_at', 'updated_at')
+    list_display = ('title', 'lessons_count', 'last_lesson_at', 'created_at', 'updated_at')
     search_fields = ('title', 'description')
     inlines = [LessonInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_deleted_objects(self, objs, request):
+        """Страница подтверждения не загружает все уроки: они удаляются в фоне"""
+        if not settings.MATERIALS_ASYNC_DELETE:
+            return super().get_deleted_objects(objs, request)
+        objs = list(objs)
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        if not settings.MATERIALS_ASYNC_DELETE:
+            return super().delete_model(request, obj)
+        deletion.delete_course(obj)
+
+    def delete_queryset(self, request, queryset):
+        if not settings.MATERIALS_ASYNC_DELETE:
+            return super().delete_queryset(request, queryset)
+        for course in queryset:
+            deletion.delete_course(course)
 
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Админ-панель для уроков"""
 
     list_display = ('title', 'course', 'created_at', 'updated_at')
-    list_filter = ('course', 'created_at')
-    search_fields = ('title', 'description', 'video_url')
\ No newline at end of file
+    list_select_related = ('course',)
+    list_filter = (('course', AutocompleteListFilter), 'created_at')
+    search_fields = ('title', 'description', 'video_url')
+    autocomplete_fields = ('course',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Счетчики у фильтров - отдельный COUNT на каждый вариант
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).visible()
+
+    def delete_queryset(self, request, queryset):
+        # Счетчики курсов обновляются одним UPDATE на курс, а не на каждый урок
+        with transaction.atomic(), counters.deferred():
+            super().delete_queryset(request, queryset)
+
+    @property
+    def media(self):
+        # Скрипты и стили автодополнения для фильтра по курсу в списке уроков
+        return super().media + AutocompleteSelect(Lesson._meta.get_field('course'), self.admin_site).media
@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class MaterialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'materials'
-    verbose_name = 'Materials'
\ No newline at end of file
+    verbose_name = 'Materials'
+
+    def ready(self):
+        """Импорт сигналов и регистрация метрик кэша при загрузке приложения"""
+        import materials.signals  # noqa: F401
+        from config import metrics
+        from materials import cache
+
+        metrics.register_collector(cache.collect_metrics)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CACHE_PREFIX = 'materials'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _get_cache():
+    """Возвращает бэкенд кэша, настроенный для материалов"""
+    return caches[settings.MATERIALS_CACHE_ALIAS]
+
+
+def _version_key(kind, pk):
+    return f'{CACHE_PREFIX}:{kind}:{pk}:version'
+
+
+def _new_version():
+    # Версия на основе времени не совпадет со старыми ключами, даже если счетчик версии был вытеснен из кэша
+    return time.time_ns()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_version(kind, pk):
+    """Текущая версия закэшированного представления объекта"""
+    cache = _get_cache()
+    key = _version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_or_build(kind, pk, variant, builder):
+    """Возвращает закэшированные данные объекта или строит их через builder и кладет в кэш"""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return builder()
+
+    cache = _get_cache()
+    key = f'{CACHE_PREFIX}:{kind}:{pk}:v{get_version(kind, pk)}:{variant}'
+    payload = cache.get(key)
+    if payload is not None:
+        _count('hits')
+        return payload
+
+    _count('misses')
+    payload = builder()
+    cache.set(key, payload, settings.MATERIALS_CACHE_TIMEOUT)
+    return payload
+
+
+def _bump_version(key):
+    cache = _get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def invalidate(kind, pk):
+    """
+    Инвалидирует все закэшированные представления объекта сменой версии: сразу и повторно после
+    фиксации транзакции, чтобы промах до фиксации не оставил под новой версией старое состояние
+    """
+    if pk is None:
+        return
+    key = _version_key(kind, pk)
+    _bump_version(key)
+    transaction.on_commit(lambda: _bump_version(key))
+
+
+def invalidate_lessons(lessons):
+    """Инвалидирует уроки и их курсы (для пакетных операций, которые не отправляют сигналы)"""
+    course_ids = set()
+    for lesson in lessons:
+        invalidate('lesson', lesson.pk)
+        course_ids.add(lesson.course_id)
+        course_ids.add(getattr(lesson, '_loaded_course_id', None))
+    for course_id in course_ids - {None}:
+        invalidate('course', course_id)
+
+
+def stats():
+    """Счетчики попаданий и промахов кэша в текущем процессе"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def collect_metrics():
+    """Счетчики кэша для /metrics (config.metrics.register_collector)"""
+    current = stats()
+    return [
+        ('materials_cache_hits_total', 'counter', 'Materials cache hits in this process.', current['hits']),
+        ('materials_cache_misses_total', 'counter', 'Materials cache misses in this process.', current['misses']),
+    ]
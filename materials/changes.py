@@ -0,0 +1,212 @@
+"""
+Лента изменений для синхронизации клиентов.
+
+Каждый поток (курсы, уроки, пользователи, удаления) читается по индексу (updated_at, id) после позиции
+из токена продолжения, и потоки сливаются по времени изменения. Токен хранит позицию каждого потока,
+поэтому синхронизация стоит пропорционально числу изменений, а не размеру каталога.
+
+Строки моложе CHANGE_FEED_LAG_SECONDS не отдаются: транзакция, начатая раньше, может зафиксироваться
+позже с меньшим updated_at, и окно задержки не дает клиенту ее пропустить. Удаления приходят
+записями Tombstone; удаление курса означает и удаление всех его уроков.
+"""
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+
+from users.serializers import UserSerializer
+from .models import Course, Lesson, Tombstone
+from .serializers import CourseListSerializer, LessonSerializer
+
+TOKEN_VERSION = 1
+
+# Курсы, уроки которых удаляются в фоне после пометки курса (materials.deletion)
+_purged_courses = ContextVar('change_feed_purged_courses', default=frozenset())
+
+
+class InvalidToken(ValueError):
+    """Токен продолжения не разобран"""
+
+
+class ExpiredToken(Exception):
+    """Записи об удалениях после позиции токена уже удалены, нужна полная синхронизация"""
+
+
+class Stream:
+    """Поток изменений одной модели в порядке (time_field, id)"""
+
+    def __init__(self, name, get_queryset, serializer_class=None, time_field='updated_at', staff_only=False,
+                 staff_only_rows=None):
+        self.name = name
+        self.get_queryset = get_queryset
+        self.serializer_class = serializer_class
+        self.time_field = time_field
+        self.staff_only = staff_only
+        # Условие (Q) на строки потока, которые видит только персонал
+        self.staff_only_rows = staff_only_rows
+
+    def fetch(self, position, until, limit, include_staff=False):
+        """До limit + 1 строк после позиции (время, id), измененных не позже until"""
+        queryset = self.get_queryset().filter(**{f'{self.time_field}__lte': until})
+        if self.staff_only_rows is not None and not include_staff:
+            queryset = queryset.exclude(self.staff_only_rows)
+        if position is not None:
+            changed_at, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.time_field}__gt': changed_at}) | Q(**{self.time_field: changed_at, 'pk__gt': pk})
+            )
+        return list(queryset.order_by(self.time_field, 'pk')[:limit + 1])
+
+    def position(self, row):
+        return getattr(row, self.time_field), row.pk
+
+    def serialize(self, rows, context):
+        if self.serializer_class is None:
+            # Поток удалений: тип и id удаленного объекта
+            return [
+                {'type': row.kind, 'id': row.object_id, 'deleted': True, 'changed_at': row.deleted_at}
+                for row in rows
+            ]
+        data = self.serializer_class(rows, many=True, context=context).data
+        return [
+            {'type': self.name, 'id': row.pk, 'deleted': False, 'changed_at': row.updated_at, 'data': item}
+            for row, item in zip(rows, data)
+        ]
+
+
+STREAMS = (
+    Stream('course', lambda: Course.objects.all(), CourseListSerializer),
+    Stream('lesson', lambda: Lesson.objects.visible(), LessonSerializer),
+    Stream('user', lambda: get_user_model().objects.all(), UserSerializer, staff_only=True),
+    Stream('deleted', lambda: Tombstone.objects.all(), time_field='deleted_at', staff_only_rows=Q(kind='user')),
+)
+
+# Тип объекта в записи об удалении по модели
+DELETION_KINDS = {Course: 'course', Lesson: 'lesson', get_user_model(): 'user'}
+
+
+def record_deletion(instance):
+    """Запись об удалении объекта для ленты изменений"""
+    Tombstone.objects.create(kind=DELETION_KINDS[type(instance)], object_id=instance.pk)
+
+
+@contextmanager
+def course_purge(course_pk):
+    """Удаления уроков курса внутри блока не записываются: запись об удалении курса уже включает их"""
+    token = _purged_courses.set(_purged_courses.get() | {course_pk})
+    try:
+        yield
+    finally:
+        _purged_courses.reset(token)
+
+
+def is_course_purged(course_pk):
+    return course_pk in _purged_courses.get()
+
+
+def encode_token(positions):
+    payload = {
+        'v': TOKEN_VERSION,
+        'p': {name: [changed_at.isoformat(), pk] for name, (changed_at, pk) in positions.items()},
+    }
+    return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_token(token):
+    """Позиции потоков {имя: (время, id)} из токена продолжения"""
+    try:
+        payload = json.loads(urlsafe_b64decode(token.encode()))
+        if payload['v'] != TOKEN_VERSION:
+            raise InvalidToken(token)
+        return {
+            name: (datetime.fromisoformat(changed_at), int(pk))
+            for name, (changed_at, pk) in payload['p'].items()
+        }
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError, binascii.Error) as error:
+        raise InvalidToken(token) from error
+
+
+def initial_positions(updated_since=None):
+    """
+    Позиции первого запроса: без updated_since - с начала (полная синхронизация), но удаления -
+    только начиная с текущего момента, так как удаленных раньше объектов у клиента еще нет
+    """
+    if updated_since is not None:
+        return {stream.name: (updated_since, 0) for stream in STREAMS}
+    now = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_LAG_SECONDS)
+    return {'deleted': (now, 0)}
+
+
+def read_changes(positions, limit, include_staff=False):
+    """
+    Изменения после позиций: (список (поток, строка) в порядке времени, новые позиции, есть ли еще изменения).
+    Из каждого потока читается не больше limit + 1 строк, затем потоки сливаются по (время, поток, id)
+    """
+    deleted_position = positions.get('deleted')
+    retention = timezone.now() - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+    if deleted_position is not None and deleted_position[0] < retention:
+        raise ExpiredToken()
+
+    until = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_LAG_SECONDS)
+    candidates = []
+    has_more = False
+    for order, stream in enumerate(STREAMS):
+        if stream.staff_only and not include_staff:
+            continue
+        rows = stream.fetch(positions.get(stream.name), until, limit, include_staff)
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        for row in rows:
+            changed_at, pk = stream.position(row)
+            candidates.append(((changed_at, order, pk), stream, row))
+
+    candidates.sort(key=lambda candidate: candidate[0])
+    if len(candidates) > limit:
+        has_more = True
+        candidates = candidates[:limit]
+
+    positions = dict(positions)
+    changes = []
+    for _, stream, row in candidates:
+        # Строки потока идут по возрастанию, последняя выданная становится его позицией
+        positions[stream.name] = stream.position(row)
+        changes.append((stream, row))
+    return changes, positions, has_more
+
+
+def get_page(positions, limit, context, include_staff=False):
+    """Сериализованная страница ленты и токен продолжения"""
+    changes, positions, has_more = read_changes(positions, limit, include_staff)
+    by_stream = {}
+    for stream, row in changes:
+        by_stream.setdefault(stream, []).append(row)
+    serialized = {}
+    for stream, rows in by_stream.items():
+        # Один сериализатор на поток, а не на каждую строку
+        for row, item in zip(rows, stream.serialize(rows, context)):
+            serialized[stream.name, row.pk] = item
+    return {
+        'changes': [serialized[stream.name, row.pk] for stream, row in changes],
+        'next_token': encode_token(positions),
+        'has_more': has_more,
+    }
+
+
+def prune_tombstones(batch_size=1000):
+    """Удаляет записи об удалениях старше CHANGE_FEED_TOMBSTONE_DAYS порциями; возвращает их число"""
+    cutoff = timezone.now() - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+    total = 0
+    while True:
+        ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff).order_by('deleted_at', 'id')
+                   .values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += Tombstone.objects.filter(pk__in=ids).delete()[0]
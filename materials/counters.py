@@ -0,0 +1,157 @@
+"""
+Денормализованные счетчики курса: lessons_count и last_lesson_at.
+
+Колонки меняются атомарными UPDATE с F()-выражениями в той же транзакции, что и уроки,
+поэтому параллельные изменения не теряют приращения. Одиночные изменения учитывают сигналы,
+пакетные пути (bulk_create, bulk_update) вызывают функции модуля явно, а внутри deferred()
+изменения копятся и применяются одним UPDATE на курс. Расхождения исправляет команда recount_lessons.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, DateTimeField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Course, Lesson
+
+_pending = ContextVar('lesson_counter_deltas', default=None)
+
+
+class Delta:
+    """Изменение счетчиков одного курса"""
+
+    __slots__ = ('count', 'last_lesson_at', 'removed')
+
+    def __init__(self):
+        self.count = 0
+        self.last_lesson_at = None
+        # После удаления или переноса урока последняя дата пересчитывается по оставшимся урокам
+        self.removed = False
+
+    def add(self, created_at):
+        self.count += 1
+        if created_at is not None and (self.last_lesson_at is None or created_at > self.last_lesson_at):
+            self.last_lesson_at = created_at
+
+    def remove(self):
+        self.count -= 1
+        self.removed = True
+
+    def merge(self, other):
+        self.count += other.count
+        self.removed = self.removed or other.removed
+        if other.last_lesson_at is not None and (
+            self.last_lesson_at is None or other.last_lesson_at > self.last_lesson_at
+        ):
+            self.last_lesson_at = other.last_lesson_at
+
+
+def last_lesson_subquery():
+    """Дата самого нового урока курса (по индексу (course, -created_at))"""
+    return Subquery(
+        Lesson.all_objects.filter(course_id=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def lessons_count_subquery():
+    return Coalesce(
+        Subquery(
+            Lesson.all_objects.filter(course_id=OuterRef('pk')).order_by()
+            .values('course_id').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def repair(course_ids):
+    """
+    Пересчитывает счетчики курсов из списка, разошедшиеся с уроками; возвращает pk исправленных курсов.
+    Исправление - один UPDATE с подзапросами, поэтому параллельные изменения уроков не теряются
+    """
+    rows = (
+        Course.all_objects.filter(pk__in=course_ids)
+        .annotate(actual_count=lessons_count_subquery(), actual_last=last_lesson_subquery())
+        .values_list('pk', 'lessons_count', 'actual_count', 'last_lesson_at', 'actual_last')
+    )
+    drifted = [pk for pk, count, actual_count, last, actual_last in rows if (count, last) != (actual_count, actual_last)]
+    if drifted:
+        Course.all_objects.filter(pk__in=drifted).update(
+            lessons_count=lessons_count_subquery(), last_lesson_at=last_lesson_subquery(),
+        )
+    return drifted
+
+
+def _apply(deltas):
+    now = timezone.now()
+    # Курсы обновляются в порядке pk, чтобы параллельные пакеты не блокировали друг друга крест-накрест
+    for course_id in sorted(deltas):
+        delta = deltas[course_id]
+        updates = {}
+        if delta.count:
+            updates['lessons_count'] = F('lessons_count') + delta.count
+        if delta.removed:
+            updates['last_lesson_at'] = last_lesson_subquery()
+        elif delta.last_lesson_at is not None:
+            value = Value(delta.last_lesson_at, output_field=DateTimeField())
+            # GREATEST в SQLite возвращает NULL, если один из аргументов NULL
+            updates['last_lesson_at'] = Coalesce(Greatest('last_lesson_at', value), value)
+        if updates:
+            # Смена updated_at отдает курс с новыми счетчиками в ленте изменений и меняет его ETag
+            Course.all_objects.filter(pk=course_id).update(updated_at=now, **updates)
+
+
+def _submit(deltas):
+    pending = _pending.get()
+    if pending is None:
+        _apply(deltas)
+        return
+    for course_id, delta in deltas.items():
+        pending.setdefault(course_id, Delta()).merge(delta)
+
+
+def lessons_added(lessons):
+    """Учитывает созданные уроки"""
+    deltas = {}
+    for lesson in lessons:
+        deltas.setdefault(lesson.course_id, Delta()).add(lesson.created_at)
+    _submit(deltas)
+
+
+def lessons_removed(lessons):
+    """Учитывает удаленные уроки"""
+    deltas = {}
+    for lesson in lessons:
+        deltas.setdefault(lesson.course_id, Delta()).remove()
+    _submit(deltas)
+
+
+def lessons_moved(lessons):
+    """Учитывает перенос уроков в другой курс (по курсу, с которым урок был загружен)"""
+    deltas = {}
+    for lesson in lessons:
+        old_course_id = getattr(lesson, '_loaded_course_id', None)
+        if old_course_id is None or old_course_id == lesson.course_id:
+            continue
+        deltas.setdefault(old_course_id, Delta()).remove()
+        deltas.setdefault(lesson.course_id, Delta()).add(lesson.created_at)
+    if deltas:
+        _submit(deltas)
+
+
+@contextmanager
+def deferred():
+    """
+    Копит изменения счетчиков и применяет их одним UPDATE на курс при выходе.
+    Используется внутри транзакции, например для удаления уроков порциями
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set({})
+    try:
+        yield
+        deltas = _pending.get()
+    finally:
+        _pending.reset(token)
+    _apply(deltas)
@@ -0,0 +1,107 @@
+"""
+Асинхронное удаление курсов.
+
+Курс помечается удаленным (deleted_at) и сразу пропадает из API, админки и поиска.
+Уроки удаляются в фоне порциями по MATERIALS_DELETE_CHUNK_SIZE, каждая в своей короткой транзакции,
+затем удаляются сам курс и файлы превью. Прогресс хранится в кэше материалов;
+прерванные удаления продолжает команда purge_deleted_courses.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from config.tasks import run_in_background
+from config.thumbnails import delete_thumbnails
+from . import cache, changes, counters, search
+from .models import Course, Lesson
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+def _progress_key(course_pk):
+    return f'{cache.CACHE_PREFIX}:deletion:{course_pk}'
+
+
+def _save_progress(course_pk, **progress):
+    progress = {'course': course_pk, **progress, 'updated_at': timezone.now().isoformat()}
+    caches[settings.MATERIALS_CACHE_ALIAS].set(_progress_key(course_pk), progress, PROGRESS_TIMEOUT)
+    return progress
+
+
+def get_progress(course_pk):
+    """Состояние удаления курса или None, если курс не удалялся"""
+    progress = caches[settings.MATERIALS_CACHE_ALIAS].get(_progress_key(course_pk))
+    if progress is None:
+        # Прогресс вытеснен из кэша или удаление еще не начато: восстанавливаем по БД
+        course = Course.all_objects.filter(pk=course_pk, deleted_at__isnull=False).first()
+        if course is not None:
+            remaining = Lesson.all_objects.filter(course_id=course_pk).count()
+            progress = {'course': course_pk, 'status': 'pending', 'deleted': None, 'total': remaining}
+    return progress
+
+
+def delete_course(course):
+    """Помечает курс удаленным и ставит удаление уроков в фон; возвращает начальный прогресс"""
+    with transaction.atomic():
+        Course.all_objects.filter(pk=course.pk).update(deleted_at=timezone.now())
+        changes.record_deletion(course)
+        search.remove_objects([course])
+        search.remove_course_lessons(course.pk)
+        cache.invalidate('course', course.pk)
+        total = Lesson.all_objects.filter(course_id=course.pk).count()
+        progress = _save_progress(course.pk, status='pending', deleted=0, total=total)
+        run_in_background(purge_course, course.pk)
+    return progress
+
+
+def purge_course(course_pk, chunk_size=None):
+    """Удаляет уроки помеченного курса порциями, затем сам курс и файлы превью"""
+    chunk_size = chunk_size or settings.MATERIALS_DELETE_CHUNK_SIZE
+    lessons = Lesson.all_objects.filter(course_id=course_pk)
+    total = lessons.count()
+    deleted = 0
+    _save_progress(course_pk, status='running', deleted=deleted, total=total)
+
+    while True:
+        with transaction.atomic(), counters.deferred(), changes.course_purge(course_pk):
+            chunk = list(lessons.order_by('pk').values_list('pk', 'preview')[:chunk_size])
+            if not chunk:
+                break
+            # Обычное удаление: сигналы сбрасывают кэш и индекс, память ограничена размером порции,
+            # а счетчики курса обновляются одним UPDATE на порцию
+            Lesson.all_objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+        delete_preview_files(Lesson, [preview for _, preview in chunk if preview])
+        deleted += len(chunk)
+        _save_progress(course_pk, status='running', deleted=deleted, total=total)
+
+    course = Course.all_objects.filter(pk=course_pk).first()
+    if course is not None:
+        course.delete()
+        if course.preview:
+            delete_preview_files(Course, [course.preview.name])
+    logger.info('Course %s deleted with %s lessons', course_pk, deleted)
+    return _save_progress(course_pk, status='done', deleted=deleted, total=total)
+
+
+def delete_preview_files(model, names):
+    """Удаляет файлы превью и их миниатюры, если на них больше не ссылается ни один объект"""
+    if not names:
+        return
+    still_used = set(model.all_objects.filter(preview__in=names).values_list('preview', flat=True))
+    storage = model._meta.get_field('preview').storage
+    for name in set(names) - still_used:
+        try:
+            storage.delete(name)
+            delete_thumbnails(name)
+        except OSError:
+            logger.exception('Failed to delete preview file %s', name)
+
+
+def pending_course_ids():
+    """Курсы, помеченные на удаление, но еще не удаленные (например, после перезапуска процесса)"""
+    return list(Course.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at').values_list('pk', flat=True))
@@ -0,0 +1,92 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Course, Lesson
+from .serializers import CourseListSerializer, CourseSerializer, LessonSerializer
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Строк экспорта за один переход из цикла событий в синхронный поток (aiter_export)
+ASYNC_BATCH_SIZE = 100
+
+# Колонки CSV берутся из списков полей сериализаторов: одна строка на урок
+COURSE_COLUMNS = [f'course_{name}' for name in CourseListSerializer.Meta.fields]
+LESSON_COLUMNS = [f'lesson_{name}' for name in LessonSerializer.Meta.fields if name != 'course']
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def get_export_courses(updated_since=None):
+    """Курсы с уроками, читаемые порциями, чтобы память не зависела от размера таблиц"""
+    courses = Course.objects.order_by('pk').prefetch_related(
+        Prefetch('lessons', queryset=Lesson.objects.order_by('pk'))
+    )
+    if updated_since is not None:
+        changed_lessons = Lesson.objects.filter(course=OuterRef('pk'), updated_at__gte=updated_since)
+        courses = courses.filter(Q(updated_at__gte=updated_since) | Exists(changed_lessons))
+    return courses.iterator(chunk_size=settings.MATERIALS_EXPORT_CHUNK_SIZE)
+
+
+def iter_ndjson(courses, context=None):
+    """Курс с уроками в виде JSON-строки на каждый курс"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for course in courses:
+        yield encoder.encode(CourseSerializer(course, context=context or {}).data) + '\n'
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+    return value
+
+
+def iter_csv(courses, context=None):
+    """CSV с заголовком и строкой на каждый урок (курс без уроков дает одну строку)"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(COURSE_COLUMNS + LESSON_COLUMNS)
+    for course in courses:
+        data = CourseSerializer(course, context=context or {}).data
+        course_row = [_csv_value(data[column[len('course_'):]]) for column in COURSE_COLUMNS]
+        lessons = data['lessons'] or [None]
+        for lesson in lessons:
+            if lesson is None:
+                lesson_row = [''] * len(LESSON_COLUMNS)
+            else:
+                lesson_row = [_csv_value(lesson[column[len('lesson_'):]]) for column in LESSON_COLUMNS]
+            yield writer.writerow(course_row + lesson_row)
+
+
+def iter_export(output_format, updated_since=None, context=None):
+    """Генератор экспорта каталога в заданном формате"""
+    courses = get_export_courses(updated_since)
+    if output_format == 'csv':
+        return iter_csv(courses, context)
+    return iter_ndjson(courses, context)
+
+
+async def aiter_export(output_format, updated_since=None, context=None):
+    """
+    Асинхронный экспорт для ASGI: синхронный генератор читается порциями через sync_to_async,
+    в одном потоке запроса, поэтому курсор БД остается в своем соединении
+    """
+    iterator = iter_export(output_format, updated_since, context)
+    next_batch = sync_to_async(lambda: ''.join(islice(iterator, ASYNC_BATCH_SIZE)))
+    try:
+        while batch := await next_batch():
+            yield batch
+    finally:
+        await sync_to_async(iterator.close)()
@@ -0,0 +1,176 @@
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from materials.models import Course, Lesson
+from users.models import User
+
+NAMESPACES = ('materials', 'users')
+# Модель, из которой берется pk для detail-путей, по префиксу имени маршрута
+DETAIL_MODELS = {'course': Course, 'lesson': Lesson, 'user': User}
+QUERY_PARAMS = {'materials:search': {'q': 'django'}}
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк всех GET-путей materials.urls и users.urls через тестовый клиент в текущем процессе.
+    Результат в JSON, чтобы сравнивать коммиты между собой:
+        python manage.py seed_data --flush
+        python manage.py bench_api --output before.json
+        python manage.py bench_api --baseline before.json
+    """
+
+    help = 'Benchmark latency, queries and memory of every GET endpoint in materials and users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', action='append', default=[], help='Benchmark only these route names')
+        parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+        parser.add_argument('--baseline', help='Previous JSON results to compare against')
+
+    def handle(self, *args, **options):
+        if not Course.objects.exists() or not Lesson.objects.exists():
+            raise CommandError('No data to benchmark, run seed_data first')
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+
+        # Ответы 405 на путях только для записи ожидаемы и не должны засорять вывод
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            # Администратор для запросов создается в транзакции, которая откатывается в конце.
+            # Лимиты THROTTLE_SCOPES отключены: иначе серия запросов к одному пути упирается в 429/503
+            with transaction.atomic(), override_settings(THROTTLE_SCOPES={}):
+                user = User.objects.create_superuser('bench-api@example.com', 'bench-api-password')
+                client.force_login(user)
+                endpoints = [
+                    self._bench(client, name, url, options['warmup'], options['requests'])
+                    for name, url in self._endpoints(options['only'])
+                ]
+                transaction.set_rollback(True)
+        finally:
+            request_logger.setLevel(level)
+
+        results = {'environment': self._environment(options['requests']), 'endpoints': endpoints}
+        payload = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                self._compare(json.load(baseline), results)
+
+    def _endpoints(self, only):
+        """Имена маршрутов и URL для GET-запросов"""
+        seen = set()
+        for name, pattern in self._iter_patterns(get_resolver().url_patterns, None):
+            if name in seen or (only and name not in only):
+                continue
+            seen.add(name)
+            kwargs = {}
+            if 'pk' in pattern.pattern.regex.groupindex:
+                model = DETAIL_MODELS[name.split(':')[-1].split('-')[0]]
+                kwargs['pk'] = model.objects.order_by('pk').values_list('pk', flat=True).first()
+            elif pattern.pattern.regex.groupindex.keys() - {'format'}:
+                continue
+            url = reverse(name, kwargs=kwargs)
+            yield name, url
+
+    def _iter_patterns(self, patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self._iter_patterns(pattern.url_patterns, pattern.namespace or namespace)
+            elif isinstance(pattern, URLPattern) and namespace in NAMESPACES and pattern.name:
+                yield f'{namespace}:{pattern.name}', pattern
+
+    def _bench(self, client, name, url, warmup, count):
+        params = QUERY_PARAMS.get(name, {})
+        for _ in range(warmup):
+            self._get(client, url, params)
+
+        # Запросы и память измеряются отдельным запросом, чтобы не искажать замеры времени
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            status, size = self._get(client, url, params)
+        query_count = len(queries)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {'name': name, 'url': url, 'status': status, 'response_bytes': size}
+        if status == 405:
+            result['skipped'] = 'GET is not allowed'
+            return result
+
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            self._get(client, url, params)
+            latencies.append((time.perf_counter() - started) * 1000)
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        result.update({
+            'requests': count,
+            'p50_ms': round(quantiles[49], 3),
+            'p95_ms': round(quantiles[94], 3),
+            'p99_ms': round(quantiles[98], 3),
+            'queries': query_count,
+            'peak_memory_kb': round(peak / 1024, 1),
+        })
+        return result
+
+    @staticmethod
+    def _get(client, url, params):
+        response = client.get(url, params)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, len(body)
+
+    @staticmethod
+    def _environment(count):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests_per_endpoint': count,
+            'rows': {
+                'users': User.objects.count(),
+                'courses': Course.objects.count(),
+                'lessons': Lesson.objects.count(),
+            },
+        }
+
+    def _compare(self, baseline, results):
+        previous = {endpoint['name']: endpoint for endpoint in baseline['endpoints']}
+        for endpoint in results['endpoints']:
+            before = previous.get(endpoint['name'])
+            if not before or 'p95_ms' not in endpoint or 'p95_ms' not in before:
+                continue
+            change = (endpoint['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            line = (
+                f'{endpoint["name"]}: p95 {before["p95_ms"]:.1f} -> {endpoint["p95_ms"]:.1f} ms ({change:+.0f}%), '
+                f'queries {before["queries"]} -> {endpoint["queries"]}'
+            )
+            regressed = change > 10 or endpoint['queries'] > before['queries']
+            self.stderr.write(line, style_func=self.style.WARNING if regressed else self.style.SUCCESS)
@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from config.fastpath import ValuesSerializer
+from materials.models import Course, Lesson
+from materials.serializers import CourseListSerializer, LessonSerializer
+from users.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    """Сравнение скорости DRF-сериализации и быстрого пути из values() (строк в секунду)"""
+
+    help = 'Benchmark rows/sec of DRF list serialization vs the values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per list')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/', HTTP_HOST='localhost')
+        context = {'request': request}
+        rows = options['rows']
+        cases = [
+            ('courses', Course.objects.all(), CourseListSerializer),
+            ('lessons', Lesson.objects.all(), LessonSerializer),
+            ('users', get_user_model().objects.order_by('email'), UserSerializer),
+        ]
+
+        for name, queryset, serializer_class in cases:
+            queryset = queryset[:rows]
+            values_serializer = ValuesSerializer.for_serializer(
+                serializer_class(context=context), queryset.query.annotations
+            )
+            if values_serializer is None:
+                raise CommandError(f'{serializer_class.__name__} is not supported by the fast path')
+
+            def drf():
+                return serializer_class(list(queryset), many=True, context=context).data
+
+            def fast():
+                return values_serializer.to_representation(queryset.values(*values_serializer.value_names))
+
+            drf_data, fast_data = drf(), fast()
+            count = len(drf_data)
+            if not count:
+                self.stdout.write(f'{name}: no rows, run seed_data first')
+                continue
+            identical = JSONRenderer().render(drf_data) == JSONRenderer().render(fast_data)
+
+            drf_rate = count * options['repeat'] / self._measure(drf, options['repeat'])
+            fast_rate = count * options['repeat'] / self._measure(fast, options['repeat'])
+            self.stdout.write(
+                f'{name:>8}: DRF {drf_rate:10.0f} rows/s, fast path {fast_rate:10.0f} rows/s '
+                f'({fast_rate / drf_rate:.1f}x), identical output: {identical}'
+            )
+
+    @staticmethod
+    def _measure(func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return time.perf_counter() - started
@@ -0,0 +1,89 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Запускается в отдельном процессе: загрузка config.wsgi и первые запросы через WSGI-приложение
+WORKER_SCRIPT = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from config.wsgi import application
+boot = time.perf_counter() - started
+
+host, paths = sys.argv[1], sys.argv[2:]
+requests = []
+for path in paths:
+    for attempt in range(2):
+        environ = {'PATH_INFO': path, 'HTTP_HOST': host}
+        setup_testing_defaults(environ)
+        statuses = []
+        started = time.perf_counter()
+        response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        requests.append({'path': path, 'attempt': attempt, 'status': statuses[0].split()[0],
+                         'ms': (time.perf_counter() - started) * 1000})
+print(json.dumps({'boot_ms': boot * 1000, 'requests': requests}))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Время запуска: manage.py (django.setup и системные проверки) и загрузка воркера WSGI
+    с прогревом и без него, включая первый и второй запрос. Каждый замер - новый процесс:
+        python manage.py bench_startup --repeat 5 --path /api/courses/ --path /api/lessons/
+    """
+
+    help = 'Benchmark manage.py startup and WSGI worker boot with and without warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Processes per measurement')
+        parser.add_argument('--path', action='append', default=[], help='Paths requested after boot')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1:
+            raise CommandError('--repeat must be positive')
+        paths = options['path'] or ['/api/courses/']
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+
+        for command in ('version', 'check'):
+            timings = [self._time_process([sys.executable, 'manage.py', command]) for _ in range(repeat)]
+            self.stdout.write(f'manage.py {command:<7}: {self._summary(timings)}')
+
+        for warmup in (False, True):
+            runs = [self._boot_worker(host, paths, warmup) for _ in range(repeat)]
+            label = 'warm-up' if warmup else 'no warm-up'
+            self.stdout.write(f'worker boot ({label}): {self._summary([run["boot_ms"] for run in runs])}')
+            for index, request in enumerate(runs[0]['requests']):
+                timings = [run['requests'][index]['ms'] for run in runs]
+                attempt = 'first' if request['attempt'] == 0 else 'second'
+                self.stdout.write(
+                    f'  {attempt:<6} GET {request["path"]} [{request["status"]}]: {self._summary(timings)}'
+                )
+
+    def _time_process(self, command):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=settings.BASE_DIR, env=os.environ, check=True, capture_output=True)
+        return (time.perf_counter() - started) * 1000
+
+    def _boot_worker(self, host, paths, warmup):
+        result = subprocess.run(
+            [sys.executable, '-c', WORKER_SCRIPT, host, *paths],
+            cwd=settings.BASE_DIR, env={**os.environ, 'WSGI_WARMUP': str(warmup)},
+            check=True, capture_output=True, text=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    @staticmethod
+    def _summary(timings):
+        return f'median {statistics.median(timings):7.1f} ms, min {min(timings):7.1f} ms, max {max(timings):7.1f} ms'
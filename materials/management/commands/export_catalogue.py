@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from materials.export import FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    """Потоковая выгрузка каталога курсов с уроками в NDJSON или CSV"""
+
+    help = 'Export all courses with their lessons as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File path (stdout by default)')
+        parser.add_argument('--updated-since', help='Only courses changed since this ISO 8601 datetime')
+
+    def handle(self, *args, **options):
+        updated_since = options['updated_since']
+        if updated_since:
+            parsed = parse_datetime(updated_since)
+            if parsed is None:
+                raise CommandError('--updated-since must be an ISO 8601 datetime')
+            updated_since = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+        chunks = iter_export(options['output_format'], updated_since or None)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
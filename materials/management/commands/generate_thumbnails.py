@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from config.thumbnails import generate_thumbnails
+from materials.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    """Параллельная генерация миниатюр для уже загруженных изображений"""
+
+    help = 'Generate preview and avatar thumbnails for existing media in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Number of worker threads')
+        parser.add_argument('--force', action='store_true', help='Regenerate existing thumbnails')
+        parser.add_argument(
+            '--model', choices=['course', 'lesson', 'user'], action='append',
+            help='Limit to the given models (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        sources = {
+            'course': (Course, 'preview'),
+            'lesson': (Lesson, 'preview'),
+            'user': (get_user_model(), 'avatar'),
+        }
+        selected = options['model'] or list(sources)
+        started = time.monotonic()
+        done = failed = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {}
+            for key in selected:
+                model, field_name = sources[key]
+                storage = model._meta.get_field(field_name).storage
+                names = (
+                    model.objects.exclude(**{f'{field_name}__isnull': True})
+                    .exclude(**{field_name: ''})
+                    .values_list(field_name, flat=True)
+                    .distinct()
+                    .iterator()
+                )
+                for name in names:
+                    future = executor.submit(self._generate, name, storage, options['force'])
+                    futures[future] = name
+
+            for future in as_completed(futures):
+                error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {error}')
+                else:
+                    done += 1
+                if (done + failed) % 100 == 0:
+                    self.stdout.write(f'Processed {done + failed}/{len(futures)}')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {done} images ({failed} failed) in {elapsed:.1f}s'
+        ))
+
+    @staticmethod
+    def _generate(name, storage, force):
+        try:
+            generate_thumbnails(name, storage, force=force)
+        except Exception as exc:  # noqa: BLE001 - ошибка одного файла не должна останавливать обработку
+            return str(exc)
+        finally:
+            connections.close_all()
+        return None
@@ -0,0 +1,82 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест запущенного сервера: N одновременных клиентов выполняют GET-запросы.
+    Например, сравнить синхронный и асинхронный список курсов под одним ASGI-воркером:
+        uvicorn config.asgi:application --workers 1
+        python manage.py loadtest http://127.0.0.1:8000 /api/courses/ /api/async/courses/ --concurrency 100
+    """
+
+    help = 'Load test GET endpoints of a running server with concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url')
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path')
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['base_url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only http://host[:port] base URLs are supported')
+
+        for path in options['paths']:
+            stats = asyncio.run(self._run(
+                url.hostname, url.port or 80, path,
+                options['concurrency'], options['requests'], options['timeout'],
+            ))
+            self.stdout.write(
+                f'{path}: {stats["rps"]:.1f} req/s, errors {stats["errors"]}, '
+                f'p50 {stats["p50"]:.1f} ms, p95 {stats["p95"]:.1f} ms, p99 {stats["p99"]:.1f} ms'
+            )
+
+    async def _run(self, host, port, path, concurrency, total, timeout):
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def client():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self._get(host, port, path), timeout)
+                except (OSError, asyncio.TimeoutError):
+                    status = None
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'rps': total / elapsed,
+            'errors': errors,
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+        }
+
+    @staticmethod
+    async def _get(host, port, path):
+        """Минимальный HTTP/1.1 GET; возвращает код ответа"""
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from materials import changes
+
+
+class Command(BaseCommand):
+    """Удаляет записи об удалениях старше CHANGE_FEED_TOMBSTONE_DAYS (запускать по расписанию)"""
+
+    help = 'Delete change-feed tombstones older than CHANGE_FEED_TOMBSTONE_DAYS in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = changes.prune_tombstones(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones'))
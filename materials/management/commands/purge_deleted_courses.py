@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from materials import deletion
+
+
+class Command(BaseCommand):
+    """Дочищает курсы, помеченные на удаление, если фоновое удаление было прервано (перезапуск, сбой)"""
+
+    help = 'Finish deleting courses marked as deleted, removing lessons in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Lessons per transaction (default: MATERIALS_DELETE_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        course_ids = deletion.pending_course_ids()
+        if not course_ids:
+            self.stdout.write('No courses pending deletion')
+            return
+        for course_pk in course_ids:
+            progress = deletion.purge_course(course_pk, options['chunk_size'])
+            self.stdout.write(f'Course {course_pk}: deleted {progress["deleted"]} lessons')
+        self.stdout.write(self.style.SUCCESS(f'Purged {len(course_ids)} courses'))
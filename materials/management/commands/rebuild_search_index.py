@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from materials import search
+from materials.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    """Полная перестройка полнотекстового индекса курсов и уроков"""
+
+    help = 'Rebuild the full-text search index for courses and lessons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING('Full-text index is not supported by this database'))
+            return
+
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            search.clear_index()
+            for model in (Course, Lesson):
+                total = 0
+                batch = []
+                for obj in model.objects.only('pk', 'title', 'description').iterator(chunk_size=batch_size):
+                    batch.append(obj)
+                    if len(batch) >= batch_size:
+                        search.index_objects(batch)
+                        total += len(batch)
+                        batch = []
+                search.index_objects(batch)
+                total += len(batch)
+                self.stdout.write(f'Indexed {total} {model._meta.verbose_name_plural}')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
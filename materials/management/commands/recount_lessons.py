@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from materials import cache, counters
+from materials.models import Course
+
+
+class Command(BaseCommand):
+    """Сверка и исправление денормализованных счетчиков курсов (lessons_count, last_lesson_at) порциями"""
+
+    help = 'Recompute course lesson counters in batches and repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = repaired = 0
+        last_pk = 0
+        while True:
+            course_ids = list(
+                Course.all_objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not course_ids:
+                break
+            # Каждая порция - отдельная короткая транзакция
+            with transaction.atomic():
+                drifted = counters.repair(course_ids)
+            for course_pk in drifted:
+                cache.invalidate('course', course_pk)
+                self.stdout.write(f'Course {course_pk}: counters repaired')
+            checked += len(course_ids)
+            repaired += len(drifted)
+            last_pk = course_ids[-1]
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} courses, repaired {repaired}'))
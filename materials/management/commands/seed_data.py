@@ -0,0 +1,101 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from materials import cache, counters, search
+from materials.models import Course, Lesson
+from users.models import User
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_PASSWORD = 'seed-password'
+WORDS = (
+    'python django api course lesson data model query index cache async stream search '
+    'design testing deploy security profile storage backend frontend review pattern'
+).split()
+CITIES = ('Moscow', 'Kazan', 'Novosibirsk', 'Yekaterinburg', 'Samara', 'Omsk')
+
+
+class Command(BaseCommand):
+    """
+    Детерминированное наполнение БД синтетическими пользователями, курсами и уроками для бенчмарков.
+    Одинаковые --seed и размеры дают одинаковые данные:
+        python manage.py seed_data --users 1000 --courses 200 --lessons 20 --flush
+    """
+
+    help = 'Seed deterministic synthetic users, courses and lessons for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--courses', type=int, default=50)
+        parser.add_argument('--lessons', type=int, default=10, help='Lessons per course')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--flush', action='store_true', help='Delete all courses and seeded users first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            if options['flush']:
+                self._flush()
+            users = self._create_users(rng, options['users'], batch_size)
+            courses = Course.objects.bulk_create(
+                [Course(title=self._sentence(rng, 3), description=self._sentence(rng, 30))
+                 for _ in range(options['courses'])],
+                batch_size=batch_size,
+            )
+            lessons = Lesson.objects.bulk_create(
+                [
+                    Lesson(
+                        course=course,
+                        title=self._sentence(rng, 4),
+                        description=self._sentence(rng, 60),
+                        video_url=f'https://video.example.com/{course.pk}/{number}',
+                    )
+                    for course in courses
+                    for number in range(options['lessons'])
+                ],
+                batch_size=batch_size,
+            )
+            # bulk_create не отправляет сигналы, поэтому счетчики курсов и индекс поиска обновляются явно
+            counters.lessons_added(lessons)
+            search.index_objects(courses)
+            search.index_objects(lessons)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(courses)} courses, {len(lessons)} lessons'
+        ))
+
+    def _flush(self):
+        lessons = list(Lesson.objects.only('pk'))
+        courses = list(Course.objects.only('pk'))
+        search.remove_objects(lessons + courses)
+        cache.invalidate_lessons(lessons)
+        for course in courses:
+            cache.invalidate('course', course.pk)
+        Course.objects.all().delete()
+        User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').delete()
+
+    @staticmethod
+    def _create_users(rng, count, batch_size):
+        # Один хеш на всех: PBKDF2 для каждого пользователя занял бы большую часть времени наполнения
+        password = make_password(SEED_PASSWORD)
+        users = [
+            User(
+                email=f'user{number:06d}@{SEED_EMAIL_DOMAIN}',
+                password=password,
+                first_name=rng.choice(WORDS).title(),
+                last_name=rng.choice(WORDS).title(),
+                phone=f'+7{rng.randrange(10 ** 9, 10 ** 10)}',
+                city=rng.choice(CITIES),
+            )
+            for number in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+
+    @staticmethod
+    def _sentence(rng, length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize()
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Создает таблицу полнотекстового индекса и заполняет ее существующими данными"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE materials_search USING fts5("
+            "title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            'INSERT INTO materials_search (rowid, title, description) '
+            'SELECT id * 2, title, description FROM materials_course'
+        )
+        schema_editor.execute(
+            'INSERT INTO materials_search (rowid, title, description) '
+            'SELECT id * 2 + 1, title, description FROM materials_lesson'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE materials_search (id bigint PRIMARY KEY, title text NOT NULL, document tsvector NOT NULL)'
+        )
+        schema_editor.execute('CREATE INDEX materials_search_document_gin ON materials_search USING GIN (document)')
+        for table, kind in (('materials_course', 0), ('materials_lesson', 1)):
+            schema_editor.execute(
+                f"INSERT INTO materials_search (id, title, document) "
+                f"SELECT id * 2 + {kind}, title, "
+                f"setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', description), 'B') "
+                f"FROM {table}"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS materials_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0002_course_lesson_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0004_course_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, storage=config.storage.ContentAddressedStorage(), upload_to='courses/previews/', verbose_name='preview'),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, storage=config.storage.ContentAddressedStorage(), upload_to='lessons/previews/', verbose_name='preview'),
+        ),
+    ]
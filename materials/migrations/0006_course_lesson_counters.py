@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_lesson_counters(apps, schema_editor):
+    """Заполняет счетчики существующих курсов"""
+    Course = apps.get_model('materials', 'Course')
+    Lesson = apps.get_model('materials', 'Lesson')
+    lessons = Lesson.objects.filter(course_id=OuterRef('pk')).order_by()
+    Course.objects.update(
+        lessons_count=Coalesce(Subquery(lessons.values('course_id').annotate(total=Count('pk')).values('total')), 0),
+        last_lesson_at=Subquery(lessons.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0005_content_addressed_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='last_lesson_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='last lesson at'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='lessons count'),
+        ),
+        migrations.RunPython(fill_lesson_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-last_lesson_at', '-id'], name='materials_c_last_le_b54ad1_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0007_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', '-created_at', '-id'], name='materials_l_course__31a510_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='materials_l_course__c8a97d_idx',
+        ),
+    ]
@@ -0,0 +1,122 @@
+import hashlib
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from config.db_router import pin_primary
+from . import cache
+
+CONDITIONAL_HEADERS = ('HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_IF_NONE_MATCH')
+
+
+class ConditionalGetMixin:
+    """
+    Условные запросы по updated_at: ETag/Last-Modified, ответ 304 на If-None-Match/If-Modified-Since
+    и 412 на If-Match для изменяющих запросов. Валидаторы считаются одним легким запросом без сериализации.
+    Списки отдают только ETag: удаление строки не меняет max(updated_at), но меняет количество в состоянии.
+    """
+
+    def get_conditional_state(self):
+        """Значения (updated_at, количества и т.п.), от которых зависит представление; None - без валидаторов"""
+        return None
+
+    def get_validators(self, request, with_last_modified=True):
+        """Вычисляет пару (ETag, Last-Modified) для текущего запроса"""
+        state = self.get_conditional_state()
+        if state is None:
+            return None, None
+        # Представление зависит от query-параметров и формата ответа
+        parts = [request.get_full_path(), request.accepted_renderer.format, *state]
+        etag = quote_etag(hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest())
+        timestamps = [value for value in state if isinstance(value, datetime)]
+        last_modified = int(max(timestamps).timestamp()) if timestamps and with_last_modified else None
+        return etag, last_modified
+
+    def _set_validators(self, response, etag, last_modified):
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def _conditional(self, handler, request, *args, with_last_modified=True, **kwargs):
+        safe = request.method in ('GET', 'HEAD')
+        if not safe and not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request, with_last_modified)
+        if etag is None:
+            # Состояния нет (объект не найден или у представления нет валидаторов): предусловия не проверяются,
+            # и обработчик сам отвечает 404 на отсутствующий объект, а не 412
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return self._set_validators(response, etag, last_modified) if safe else response
+
+        response = handler(request, *args, **kwargs)
+        if safe and response.status_code == 200:
+            self._set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, with_last_modified=False, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self._conditional(super().update, request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self._conditional(super().destroy, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin:
+    """Детальное представление объекта из кэша materials.cache"""
+
+    cache_kind = None
+
+    def get_cache_variant(self, request):
+        """
+        Вариант представления: схема и хост (абсолютные URL), формат ответа и нормализованные ?fields=/?expand=.
+        Прочие query-параметры ответ не меняют и не должны размножать записи кэша
+        """
+        fields = self.get_requested_fields() if hasattr(self, 'get_requested_fields') else None
+        expand = self.get_expanded_fields() if hasattr(self, 'get_expanded_fields') else ()
+        parts = [
+            request.scheme, request.get_host(), request.accepted_renderer.format,
+            ','.join(sorted(fields)) if fields is not None else '*', ','.join(sorted(expand)),
+        ]
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        payload = cache.get_or_build(
+            self.cache_kind, pk, self.get_cache_variant(request), lambda: self._build_payload(request, *args, **kwargs)
+        )
+        return Response(payload)
+
+    def _build_payload(self, request, *args, **kwargs):
+        # Отстающая реплика положила бы в кэш старые данные под новой версией, поэтому промах читается из основной БД
+        with pin_primary():
+            return super().retrieve(request, *args, **kwargs).data
+
+
+class CourseFilterMixin:
+    """Фильтр уроков ?course=<id>, читается по индексу (course, -created_at, -id)"""
+
+    course_query_param = 'course'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        course = self.request.query_params.get(self.course_query_param)
+        if course is None:
+            return queryset
+        try:
+            course = int(course)
+        except ValueError:
+            raise ValidationError({self.course_query_param: ['Expected an integer.']})
+        return queryset.filter(course_id=course)
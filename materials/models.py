@@ -1,24 +1,72 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from config.storage import ContentAddressedStorage
+
+
+class CourseManager(models.Manager):
+    """Курсы без помеченных на удаление"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class LessonQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Уроки курсов, не помеченных на удаление (до их удаления в фоне). Фильтр - подзапрос NOT IN
+        по короткому списку помеченных курсов, без JOIN с курсами: чтение уроков идет по их индексам.
+        Применяется в точках входа API и админки, менеджер по умолчанию видит все уроки
+        """
+        return self.exclude(course_id__in=Course.all_objects.filter(deleted_at__isnull=False).values('pk'))
+
 
 class Course(models.Model):
     """Модель курса"""
 
     title = models.CharField(_('title'), max_length=150)
-    preview = models.ImageField(_('preview'), upload_to='courses/previews/', blank=True, null=True)
+    preview = models.ImageField(
+        _('preview'), upload_to='courses/previews/', storage=ContentAddressedStorage(), blank=True, null=True
+    )
     description = models.TextField(_('description'), blank=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    # Курс скрыт сразу, а уроки и сам курс удаляются в фоне (materials.deletion)
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, blank=True, editable=False, db_index=True)
+    # Денормализованные счетчики уроков, обновляются materials.counters
+    lessons_count = models.IntegerField(_('lessons count'), default=0, editable=False)
+    last_lesson_at = models.DateTimeField(_('last lesson at'), null=True, blank=True, editable=False)
+
+    objects = CourseManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходное превью, чтобы не пересоздавать миниатюры при каждом сохранении
+        instance._loaded_preview = instance.__dict__.get('preview')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_preview = self.preview.name
+
     class Meta:
         verbose_name = _('course')
         verbose_name_plural = _('courses')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            # Сортировка по последнему уроку без JOIN и агрегации
+            models.Index(fields=['-last_lesson_at', '-id']),
+            # Лента изменений (materials.changes)
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
 
 class Lesson(models.Model):
@@ -32,15 +80,60 @@ class Lesson(models.Model):
     )
     title = models.CharField(_('title'), max_length=150)
     description = models.TextField(_('description'), blank=True)
-    preview = models.ImageField(_('preview'), upload_to='lessons/previews/', blank=True, null=True)
+    preview = models.ImageField(
+        _('preview'), upload_to='lessons/previews/', storage=ContentAddressedStorage(), blank=True, null=True
+    )
     video_url = models.URLField(_('video URL'), blank=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
+    objects = LessonQuerySet.as_manager()
+    # Явное имя для кода, которому нужны и уроки помеченных на удаление курсов (materials.deletion, counters)
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходный курс, чтобы обработать перенос урока в другой курс
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        instance._loaded_preview = instance.__dict__.get('preview')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Сигнал post_save (счетчики курса) отправляется вне транзакции save_base: объединяем их в одну
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_course_id = self.course_id
+        self._loaded_preview = self.preview.name
+
     class Meta:
         verbose_name = _('lesson')
         verbose_name_plural = _('lessons')
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            # Уроки курса по странице: /api/courses/<id>/lessons/ и ?course=
+            models.Index(fields=['course', '-created_at', '-id']),
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+
+class Tombstone(models.Model):
+    """Запись об удаленном объекте для ленты изменений (materials.changes)"""
+
+    kind = models.CharField(_('kind'), max_length=20)
+    object_id = models.BigIntegerField(_('object id'))
+    deleted_at = models.DateTimeField(_('deleted at'), default=timezone.now)
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+    class Meta:
+        verbose_name = _('tombstone')
+        verbose_name_plural = _('tombstones')
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Полнотекстовый поиск по курсам и урокам.
+
+Индекс хранится в отдельной таблице materials_search (создается миграцией 0003):
+виртуальная таблица FTS5 на SQLite, таблица с tsvector и GIN-индексом на PostgreSQL.
+rowid записи кодирует тип и id объекта, поэтому обновление и удаление идут по первичному ключу.
+"""
+import re
+
+from django.db import connection, connections, router
+
+from .models import Course, Lesson
+
+KINDS = {Course: 0, Lesson: 1}
+KIND_NAMES = {0: 'course', 1: 'lesson'}
+TABLE = 'materials_search'
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _row_id(instance):
+    return instance.pk * 2 + KINDS[type(instance)]
+
+
+def _split_row_id(row_id):
+    return KIND_NAMES[row_id % 2], row_id // 2
+
+
+def _vendor():
+    return connection.vendor
+
+
+def is_supported():
+    """Поддерживается ли полнотекстовый индекс текущей БД"""
+    return _vendor() in ('sqlite', 'postgresql')
+
+
+def index_objects(instances):
+    """Добавляет или обновляет записи индекса для курсов и уроков"""
+    if not is_supported():
+        return
+    rows = [(_row_id(obj), obj.title, obj.description) for obj in instances]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if _vendor() == 'sqlite':
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, description) VALUES (%s, %s, %s)', rows)
+        else:
+            cursor.executemany(
+                f"""
+                INSERT INTO {TABLE} (id, title, document)
+                VALUES (%s, %s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))
+                ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, document = EXCLUDED.document
+                """,
+                [(row_id, title, title, description) for row_id, title, description in rows],
+            )
+
+
+def remove_objects(instances):
+    """Удаляет записи индекса для курсов и уроков"""
+    if not is_supported():
+        return
+    row_ids = [(_row_id(obj),) for obj in instances if obj.pk is not None]
+    id_column = 'rowid' if _vendor() == 'sqlite' else 'id'
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE {id_column} = %s', row_ids)
+
+
+def remove_course_lessons(course_pk):
+    """Удаляет из индекса все уроки курса одним запросом"""
+    if not is_supported():
+        return
+    id_column = 'rowid' if _vendor() == 'sqlite' else 'id'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE {id_column} IN '
+            f'(SELECT id * 2 + {KINDS[Lesson]} FROM {Lesson._meta.db_table} WHERE course_id = %s)',
+            [course_pk],
+        )
+
+
+def clear_index():
+    """Полная очистка индекса"""
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def search(query, limit, offset=0):
+    """
+    Ранжированный поиск с префиксным совпадением слов запроса.
+    Возвращает список словарей {type, id, title, rank}, лучшие совпадения первыми.
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words:
+        return []
+
+    if _vendor() == 'sqlite':
+        sql = f"""
+            SELECT rowid, title, bm25({TABLE}, 10.0, 1.0) AS rank
+            FROM {TABLE} WHERE {TABLE} MATCH %s
+            ORDER BY rank LIMIT %s OFFSET %s
+        """
+        params = [_sqlite_match(words), limit, offset]
+    elif _vendor() == 'postgresql':
+        sql = f"""
+            SELECT id, title, ts_rank(document, query) AS rank
+            FROM {TABLE}, to_tsquery('simple', %s) AS query
+            WHERE document @@ query
+            ORDER BY rank DESC, id LIMIT %s OFFSET %s
+        """
+        params = [_postgres_match(words), limit, offset]
+    else:
+        return _fallback_search(words, limit, offset)
+
+    # Поиск только читает индекс, поэтому идет туда же, куда чтения курсов (на реплику)
+    with connections[router.db_for_read(Course)].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for row_id, title, rank in rows:
+        kind, object_id = _split_row_id(row_id)
+        # bm25 в SQLite отрицателен (меньше - лучше), приводим к общему виду "больше - лучше"
+        results.append({'type': kind, 'id': object_id, 'title': title, 'rank': abs(rank)})
+    return results
+
+
+def matching_ids(query, model):
+    """
+    Подзапрос (sql, params) с id объектов модели, подходящих под запрос,
+    для queryset.filter(pk__in=RawSQL(sql, params)); None, если индекс недоступен или слов нет
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words or not is_supported():
+        return None
+    kind = KINDS[model]
+    if _vendor() == 'sqlite':
+        return f'SELECT rowid / 2 FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% 2 = {kind}', [_sqlite_match(words)]
+    return (
+        f"SELECT id / 2 FROM {TABLE} WHERE document @@ to_tsquery('simple', %s) AND id %% 2 = {kind}",
+        [_postgres_match(words)],
+    )
+
+
+def _sqlite_match(words):
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _postgres_match(words):
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def _fallback_search(words, limit, offset):
+    """Поиск без индекса для прочих СУБД"""
+    results = []
+    for model, kind in KINDS.items():
+        queryset = model.objects.all()
+        for word in words:
+            queryset = queryset.filter(title__icontains=word)
+        results.extend(
+            {'type': KIND_NAMES[kind], 'id': pk, 'title': title, 'rank': 0}
+            for pk, title in queryset.values_list('pk', 'title')[:offset + limit]
+        )
+    return results[offset:offset + limit]
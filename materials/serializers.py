@@ -1,25 +1,128 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from config.sparse import DynamicFieldsSerializerMixin
+from config.thumbnails import ThumbnailsField
+from . import cache, counters, search
 from .models import Course, Lesson
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связь по первичному ключу, использующая заранее загруженные объекты вместо запроса на каждое значение"""
+
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is not None:
+            try:
+                return self.preloaded[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class LessonListSerializer(serializers.ListSerializer):
+    """Пакетное создание и обновление уроков через bulk_create/bulk_update"""
+
+    def to_internal_value(self, data):
+        # Загружаем все упомянутые курсы одним запросом
+        if isinstance(data, list):
+            course_ids = set()
+            for item in data:
+                try:
+                    course_ids.add(int(item['course']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.child.fields['course'].preloaded = Course.objects.in_bulk(course_ids)
+        self._matched_instances = []
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        # При обновлении self.instance - словарь {id: урок}, подставляем нужный урок по id из данных
+        if self.instance is not None:
+            lesson_id = data.get('id') if isinstance(data, dict) else None
+            try:
+                if isinstance(lesson_id, bool):
+                    # int(True) == 1: логическое значение не принимается за id
+                    raise TypeError(lesson_id)
+                lesson = self.instance[int(lesson_id)]
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError({'id': ['Lesson not found.']})
+            self.child.instance = lesson
+            self.child.initial_data = data
+            self._matched_instances.append(lesson)
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        # bulk_create не отправляет сигналы, поэтому счетчики, кэш и индекс обновляются явно
+        with transaction.atomic():
+            lessons = Lesson.objects.bulk_create(
+                [Lesson(**attrs) for attrs in validated_data],
+                batch_size=settings.MATERIALS_BULK_BATCH_SIZE,
+            )
+            counters.lessons_added(lessons)
+        cache.invalidate_lessons(lessons)
+        search.index_objects(lessons)
+        return lessons
+
+    def update(self, instance, validated_data):
+        # bulk_update не вызывает pre_save, поэтому updated_at проставляем сами
+        now = timezone.now()
+        fields = {'updated_at'}
+        for lesson, attrs in zip(self._matched_instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(lesson, attr, value)
+            lesson.updated_at = now
+            fields.update(attrs)
+        with transaction.atomic():
+            Lesson.objects.bulk_update(
+                self._matched_instances, sorted(fields),
+                batch_size=settings.MATERIALS_BULK_BATCH_SIZE,
+            )
+            counters.lessons_moved(self._matched_instances)
+        cache.invalidate_lessons(self._matched_instances)
+        search.index_objects(self._matched_instances)
+        for lesson in self._matched_instances:
+            lesson._loaded_course_id = lesson.course_id
+        return self._matched_instances
+
+
+class LessonSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для урока"""
 
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    preview_thumbnails = ThumbnailsField(source='preview')
+
     class Meta:
         model = Lesson
-        fields = ['id', 'course', 'title', 'description', 'preview', 'video_url', 'created_at', 'updated_at']
+        fields = [
+            'id', 'course', 'title', 'description', 'preview', 'preview_thumbnails',
+            'video_url', 'created_at', 'updated_at'
+        ]
+        list_serializer_class = LessonListSerializer
 
 
-class CourseSerializer(serializers.ModelSerializer):
-    """Сериализатор для курса"""
+class CourseListSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
+    """Облегченный сериализатор курса для списка (без вложенных уроков)"""
 
-    lessons = LessonSerializer(many=True, read_only=True)
-    lessons_count = serializers.SerializerMethodField()
+    preview_thumbnails = ThumbnailsField(source='preview')
 
     class Meta:
         model = Course
-        fields = ['id', 'title', 'preview', 'description', 'lessons', 'lessons_count', 'created_at', 'updated_at']
+        fields = [
+            'id', 'title', 'preview', 'preview_thumbnails', 'description',
+            'lessons_count', 'last_lesson_at', 'created_at', 'updated_at'
+        ]
+
+
+class CourseSerializer(CourseListSerializer):
+    """Сериализатор для курса"""
+
+    lessons = LessonSerializer(many=True, read_only=True)
 
-    def get_lessons_count(self, obj):
-        """Получение количества уроков в курсе"""
-        return obj.lessons.count()
+    class Meta(CourseListSerializer.Meta):
+        fields = [
+            'id', 'title', 'preview', 'preview_thumbnails', 'description',
+            'lessons', 'lessons_count', 'last_lesson_at', 'created_at', 'updated_at'
+        ]
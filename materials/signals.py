@@ -0,0 +1,81 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config.tasks import run_in_background
+from config.thumbnails import schedule_thumbnails
+from . import cache, changes, counters, deletion, search
+from .models import Course, Lesson
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_cache(sender, instance, **kwargs):
+    """Сброс кэша курса при изменении или удалении"""
+    cache.invalidate('course', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_lesson_cache(sender, instance, **kwargs):
+    """Сброс кэша урока и его курса (в том числе прежнего при переносе урока)"""
+    cache.invalidate_lessons([instance])
+
+
+@receiver(post_save, sender=Lesson)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """Счетчики курса при создании урока и при переносе в другой курс"""
+    if created:
+        counters.lessons_added([instance])
+    else:
+        counters.lessons_moved([instance])
+
+
+@receiver(post_delete, sender=Lesson)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    """Счетчики курса при удалении урока (кроме каскадного удаления вместе с курсом)"""
+    if isinstance(origin, Course) or getattr(origin, 'model', None) is Course:
+        return
+    counters.lessons_removed([instance])
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def record_deletion(sender, instance, origin=None, **kwargs):
+    """Запись об удалении для ленты изменений"""
+    if isinstance(instance, Course) and instance.deleted_at is not None:
+        # Запись уже сделана при пометке курса удаленным
+        return
+    if isinstance(instance, Lesson) and (
+        isinstance(origin, Course) or getattr(origin, 'model', None) is Course
+        or changes.is_course_purged(instance.course_id)
+    ):
+        # Удаление курса (каскадное или фоновое после пометки) означает для клиента и удаление его уроков
+        return
+    changes.record_deletion(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+def generate_preview_thumbnails(sender, instance, created, update_fields=None, **kwargs):
+    """Фоновая генерация миниатюр превью, только если оно сменилось; замененный файл удаляется"""
+    if update_fields is not None and 'preview' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_preview', None)
+    if not created and instance.preview.name == loaded:
+        return
+    schedule_thumbnails(instance.preview)
+    if loaded and not created:
+        # Файл с тем же содержимым может быть превью другого объекта - delete_preview_files это проверяет
+        run_in_background(deletion.delete_preview_files, sender, [loaded])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+def update_search_index(sender, instance, **kwargs):
+    """Обновление полнотекстового индекса"""
+    search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаление из полнотекстового индекса"""
+    search.remove_objects([instance])
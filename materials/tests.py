@@ -0,0 +1,460 @@
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from config.fastpath import ValuesSerializer
+from config.metrics import metrics_view
+from config.pagination import EstimatedCountPaginator
+from config.thumbnails import thumbnail_name
+from users.models import User
+from . import cache, changes, deletion
+from .models import Course, Lesson, Tombstone
+from .serializers import CourseListSerializer, LessonSerializer
+
+
+class CourseQueryCountTests(APITestCase):
+    """Число запросов к БД в списке и детальном курсе не зависит от числа курсов и уроков"""
+
+    def create_courses(self, count):
+        """count курсов по count уроков; возвращает последний курс"""
+        for index in range(count):
+            course = Course.objects.create(title=f'Course {index}')
+            for number in range(count):
+                Lesson.objects.create(course=course, title=f'Lesson {number}')
+        return course
+
+    def count_queries(self, url):
+        # Детальный курс отдается из кэша materials.cache, поэтому считается построение ответа
+        caches[settings.MATERIALS_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url_for):
+        course = self.create_courses(5)
+        expected = self.count_queries(url_for(course))
+        course = self.create_courses(10)
+        caches[settings.MATERIALS_CACHE_ALIAS].clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url_for(course))
+        self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        self.assert_constant_queries(lambda course: reverse('materials:course-list'))
+
+    def test_list_with_lessons(self):
+        self.assert_constant_queries(lambda course: reverse('materials:course-list') + '?expand=lessons')
+
+    def test_detail(self):
+        self.assert_constant_queries(lambda course: reverse('materials:course-detail', kwargs={'pk': course.pk}))
+
+    def test_detail_lessons(self):
+        caches[settings.MATERIALS_CACHE_ALIAS].clear()
+        course = self.create_courses(3)
+        response = self.client.get(reverse('materials:course-detail', kwargs={'pk': course.pk}))
+        self.assertEqual(response.data['lessons_count'], 3)
+        self.assertEqual(len(response.data['lessons']), 3)
+
+
+class CacheInvalidationTests(TestCase):
+    """Промах кэша внутри незафиксированной транзакции не оставляет старые данные после фиксации"""
+
+    def test_miss_before_commit_is_not_served_after_commit(self):
+        course = Course.objects.create(title='Course')
+        lesson = Lesson.objects.create(course=course, title='Old')
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                lesson.title = 'New'
+                lesson.save()
+                # Параллельный запрос до фиксации видит зафиксированную старую строку
+                cache.get_or_build('lesson', lesson.pk, 'variant', lambda: {'title': 'Old'})
+        payload = cache.get_or_build('lesson', lesson.pk, 'variant', lambda: {'title': 'New'})
+        self.assertEqual(payload, {'title': 'New'})
+
+
+class CounterTransactionTests(TestCase):
+    """Счетчики курса меняются в одной транзакции с сохранением урока"""
+
+    def test_failed_save_rolls_back_counters(self):
+        course = Course.objects.create(title='Course')
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('save failed')
+
+        # Подключается после обработчика счетчиков и срабатывает уже после их UPDATE
+        post_save.connect(fail, sender=Lesson, dispatch_uid='test-failing-save')
+        try:
+            with self.assertRaises(RuntimeError):
+                Lesson.objects.create(course=course, title='Lesson')
+        finally:
+            post_save.disconnect(sender=Lesson, dispatch_uid='test-failing-save')
+
+        course.refresh_from_db()
+        self.assertEqual(course.lessons_count, 0)
+        self.assertIsNone(course.last_lesson_at)
+        self.assertFalse(Lesson.objects.exists())
+
+    def test_save_updates_counters(self):
+        course = Course.objects.create(title='Course')
+        lesson = Lesson.objects.create(course=course, title='Lesson')
+        course.refresh_from_db()
+        self.assertEqual(course.lessons_count, 1)
+        self.assertEqual(course.last_lesson_at, lesson.created_at)
+
+
+@override_settings(CHANGE_FEED_LAG_SECONDS=0)
+class ChangeFeedDeletionTests(APITestCase):
+    """Записи об удалениях в ленте изменений"""
+
+    def setUp(self):
+        self.since = (timezone.now() - timedelta(minutes=1)).isoformat()
+
+    def deleted(self, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        response = self.client.get(reverse('materials:change-feed'), {'updated_since': self.since})
+        self.assertEqual(response.status_code, 200)
+        return [(change['type'], change['id']) for change in response.data['changes'] if change['deleted']]
+
+    def test_purge_writes_no_lesson_tombstones(self):
+        course = Course.objects.create(title='Course')
+        for number in range(3):
+            Lesson.objects.create(course=course, title=f'Lesson {number}')
+        Course.all_objects.filter(pk=course.pk).update(deleted_at=timezone.now())
+        changes.record_deletion(course)
+
+        deletion.purge_course(course.pk, chunk_size=2)
+
+        self.assertFalse(Lesson.all_objects.filter(course_id=course.pk).exists())
+        self.assertEqual(list(Tombstone.objects.values_list('kind', 'object_id')), [('course', course.pk)])
+
+    def test_user_deletions_only_for_staff(self):
+        user = User.objects.create_user('deleted@example.com', 'password')
+        user_pk = user.pk
+        user.delete()
+        self.assertNotIn(('user', user_pk), self.deleted())
+        self.assertNotIn(('user', user_pk), self.deleted(User.objects.create_user('reader@example.com', 'password')))
+        self.assertIn(('user', user_pk), self.deleted(User.objects.create_superuser('staff@example.com', 'password')))
+
+
+class ConditionalRequestTests(APITestCase):
+    """ETag, ответы 304 и предусловия If-Match для курсов и уроков"""
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Course')
+        self.lesson = Lesson.objects.create(course=self.course, title='Lesson')
+        self.url = reverse('materials:lesson-detail', kwargs={'pk': self.lesson.pk})
+
+    def test_if_none_match_returns_304(self):
+        for url in (self.url, reverse('materials:course-detail', kwargs={'pk': self.course.pk}),
+                    reverse('materials:course-list')):
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, headers={'if-none-match': etag})
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_after_update(self):
+        etag = self.client.get(self.url)['ETag']
+        later = timezone.now() + timedelta(seconds=1)
+        Lesson.objects.filter(pk=self.lesson.pk).update(title='Changed', updated_at=later)
+        self.assertEqual(self.client.get(self.url, headers={'if-none-match': etag}).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        response = self.client.get(reverse('materials:lesson-list'))
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_put_with_stale_if_match_returns_412(self):
+        data = {'course': self.course.pk, 'title': 'New title'}
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.put(self.url, data, headers={'if-match': '"stale"'})
+        self.assertEqual(response.status_code, 412)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.title, 'Lesson')
+
+        response = self.client.put(self.url, data, headers={'if-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'New title')
+
+    def test_if_match_on_missing_object_returns_404(self):
+        url = reverse('materials:lesson-detail', kwargs={'pk': self.lesson.pk + 100})
+        self.assertEqual(self.client.put(url, {'title': 'x'}, headers={'if-match': '"any"'}).status_code, 404)
+        self.assertEqual(self.client.delete(url, headers={'if-match': '"any"'}).status_code, 404)
+
+
+class LessonBulkTests(APITestCase):
+    """Пакетное создание, обновление и удаление уроков"""
+
+    def setUp(self):
+        self.url = reverse('materials:lesson-bulk')
+        self.course = Course.objects.create(title='Course')
+        self.other = Course.objects.create(title='Other')
+
+    def test_create_update_delete(self):
+        lesson = Lesson.objects.create(course=self.course, title='Lesson')
+        removed = Lesson.objects.create(course=self.course, title='Removed')
+        response = self.client.post(self.url, {
+            'create': [{'course': self.course.pk, 'title': 'First'}, {'course': self.other.pk, 'title': 'Second'}],
+            'update': [{'id': lesson.pk, 'course': self.other.pk}],
+            'delete': [removed.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([item['title'] for item in response.data['created']], ['First', 'Second'])
+        self.assertEqual(response.data['updated'][0]['course'], self.other.pk)
+        self.assertFalse(Lesson.objects.filter(pk=removed.pk).exists())
+
+        self.course.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.course.lessons_count, self.other.lessons_count), (1, 2))
+
+    def test_list_body_creates(self):
+        response = self.client.post(self.url, [{'course': self.course.pk, 'title': 'Lesson'}], format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(Lesson.objects.count(), 1)
+
+    def test_invalid_bodies(self):
+        for body in ('lessons', 42, {'create': 'lessons'}):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_booleans_are_not_ids(self):
+        # true совпал бы с id 1
+        lesson = Lesson.objects.create(pk=1, course=self.course, title='Lesson')
+        response = self.client.post(self.url, {'delete': [True]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {'update': [{'id': True, 'title': 'Changed'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.title, 'Lesson')
+
+
+class FastListSerializationTests(APITestCase):
+    """Быстрый путь сериализации списков (config.fastpath) совпадает с выводом DRF побайтно"""
+
+    def setUp(self):
+        course = Course.objects.create(title='Курс', description='Описание', preview='courses/previews/ab/ab.png')
+        Lesson.objects.create(
+            course=course, title='Урок', preview='lessons/previews/cd/cd.png', video_url='https://example.com/v',
+        )
+        Lesson.objects.create(course=course, title='Без превью')
+        self.request = RequestFactory().get('/', HTTP_HOST='testserver')
+
+    def assert_identical(self, queryset, serializer_class):
+        context = {'request': self.request}
+        serializer = serializer_class(context=context)
+        values_serializer = ValuesSerializer.for_serializer(serializer, queryset.query.annotations)
+        self.assertIsNotNone(values_serializer)
+        fast = values_serializer.to_representation(queryset.values(*values_serializer.value_names))
+        drf = serializer_class(list(queryset), many=True, context=context).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_courses(self):
+        self.assert_identical(Course.objects.order_by('pk'), CourseListSerializer)
+
+    def test_lessons(self):
+        self.assert_identical(Lesson.objects.order_by('pk'), LessonSerializer)
+
+    def test_list_endpoint(self):
+        response = self.client.get(reverse('materials:lesson-list'))
+        lessons = Lesson.objects.order_by('-created_at', '-id')
+        expected = LessonSerializer(lessons, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+
+class DeletedCourseLessonsTests(APITestCase):
+    """Уроки курса, помеченного на удаление, скрыты из API до их удаления в фоне"""
+
+    def setUp(self):
+        self.deleted = Course.objects.create(title='Deleted')
+        self.hidden = Lesson.objects.create(course=self.deleted, title='Hidden')
+        course = Course.objects.create(title='Course')
+        self.visible = Lesson.objects.create(course=course, title='Visible')
+        Course.all_objects.filter(pk=self.deleted.pk).update(deleted_at=timezone.now())
+
+    def result_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_lesson_list(self):
+        self.assertEqual(self.result_ids(reverse('materials:lesson-list')), [self.visible.pk])
+        self.assertEqual(self.result_ids(reverse('materials:lesson-list') + f'?course={self.deleted.pk}'), [])
+
+    def test_lesson_detail(self):
+        response = self.client.get(reverse('materials:lesson-detail', kwargs={'pk': self.hidden.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_course_lessons(self):
+        response = self.client.get(reverse('materials:course-lessons', kwargs={'pk': self.deleted.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_async_list(self):
+        self.assertEqual(self.result_ids(reverse('materials:lesson-list-async')), [self.visible.pk])
+        response = self.client.get(reverse('materials:lesson-detail-async', kwargs={'pk': self.hidden.pk}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseLessonListTests(APITestCase):
+    """Уроки курса с keyset-пагинацией и фильтр ?course= в асинхронном списке"""
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Course')
+        self.lessons = [Lesson.objects.create(course=self.course, title=f'Lesson {number}') for number in range(3)]
+        Lesson.objects.create(course=Course.objects.create(title='Other'), title='Other lesson')
+
+    def test_pages(self):
+        url = reverse('materials:course-lessons', kwargs={'pk': self.course.pk}) + '?page_size=2'
+        first = self.client.get(url).json()
+        second = self.client.get(first['next']).json()
+        ids = [item['id'] for item in first['results'] + second['results']]
+        self.assertEqual(ids, [lesson.pk for lesson in reversed(self.lessons)])
+        self.assertIsNone(second['next'])
+
+    def test_empty_and_missing_course(self):
+        empty = Course.objects.create(title='Empty')
+        response = self.client.get(reverse('materials:course-lessons', kwargs={'pk': empty.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+        response = self.client.get(reverse('materials:course-lessons', kwargs={'pk': empty.pk + 100}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_async_course_filter(self):
+        url = reverse('materials:lesson-list-async')
+        response = self.client.get(url, {'course': self.course.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        for value in ('abc', '²', ''):
+            self.assertEqual(self.client.get(url, {'course': value}).status_code, 400, value)
+
+
+class AsyncCursorTests(APITestCase):
+    """Испорченный курсор асинхронного списка - 404, как у CursorPagination, а не первая страница"""
+
+    def test_invalid_cursor(self):
+        course = Course.objects.create(title='Course')
+        for number in range(3):
+            Lesson.objects.create(course=course, title=f'Lesson {number}')
+        url = reverse('materials:lesson-list-async')
+        first = self.client.get(url, {'page_size': 2}).json()
+        self.assertEqual(len(self.client.get(first['next']).json()['results']), 1)
+
+        for cursor in ('garbage', 'bm8tc2VwYXJhdG9y', 'MjAyNC0wMS0wMXxhYmM='):
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+        self.assertEqual(self.client.options(url).status_code, 200)
+
+
+@override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'], METRICS_TRUSTED_PROXIES=['10.0.0.1'], METRICS_TOKEN='')
+class MetricsAccessTests(TestCase):
+    """Доступ к /metrics за обратным прокси и по токену"""
+
+    def get(self, remote_addr, **headers):
+        request = RequestFactory().get('/metrics', REMOTE_ADDR=remote_addr, headers=headers)
+        return metrics_view(request).status_code
+
+    def test_client_address_behind_proxy(self):
+        self.assertEqual(self.get('10.0.0.5'), 200)
+        # Без X-Forwarded-For адрес прокси не дает доступа
+        self.assertEqual(self.get('10.0.0.1'), 403)
+        self.assertEqual(self.get('10.0.0.1', x_forwarded_for='10.0.0.5'), 200)
+        self.assertEqual(self.get('10.0.0.1', x_forwarded_for='203.0.113.7'), 403)
+        # Подделанное клиентом левое значение не учитывается
+        self.assertEqual(self.get('10.0.0.1', x_forwarded_for='10.0.0.5, 203.0.113.7'), 403)
+        # Заголовок от недоверенного адреса игнорируется
+        self.assertEqual(self.get('203.0.113.7', x_forwarded_for='10.0.0.5'), 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.get('203.0.113.7', authorization='Bearer secret'), 200)
+        self.assertEqual(self.get('203.0.113.7', authorization='Bearer wrong'), 403)
+        self.assertEqual(self.get('203.0.113.7'), 403)
+
+
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+class EstimatedCountPaginatorTests(TestCase):
+    """Без оценки планировщика (SQLite с фильтром) число строк считается точно"""
+
+    def test_filtered_count_without_estimate(self):
+        course = Course.objects.create(title='Course')
+        for number in range(5):
+            Lesson.objects.create(course=course, title=f'Lesson {number}')
+        Lesson.objects.create(course=Course.objects.create(title='Other'), title='Other lesson')
+        paginator = EstimatedCountPaginator(Lesson.objects.filter(course=course), per_page=2)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(EstimatedCountPaginator(Lesson.objects.all(), per_page=2).count, 6)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class PreviewThumbnailTests(TestCase):
+    """Миниатюры превью создаются только при его смене, замененный файл удаляется, если больше не используется"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.course = Course.objects.create(title='Course')
+
+    @staticmethod
+    def image(color):
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue(), 'preview.png')
+
+    def create_lesson(self, color):
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = Lesson(course=self.course, title='Lesson')
+            lesson.preview.save('preview.png', self.image(color))
+        return Lesson.objects.get(pk=lesson.pk)
+
+    def assert_thumbnails(self, name, exist):
+        for size in settings.THUMBNAIL_SIZES:
+            self.assertEqual(default_storage.exists(thumbnail_name(name, size)), exist, size)
+
+    def test_unchanged_preview(self):
+        lesson = self.create_lesson('red')
+        name = lesson.preview.name
+        self.assert_thumbnails(name, True)
+        for size in settings.THUMBNAIL_SIZES:
+            default_storage.delete(thumbnail_name(name, size))
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.title = 'Renamed'
+            lesson.save()
+            lesson.save(update_fields=['description'])
+        self.assert_thumbnails(name, False)
+
+    def test_replaced_preview(self):
+        lesson = self.create_lesson('red')
+        old_name = lesson.preview.name
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.preview.save('preview.png', self.image('blue'))
+        self.assertNotEqual(lesson.preview.name, old_name)
+        self.assert_thumbnails(lesson.preview.name, True)
+        self.assertFalse(lesson.preview.storage.exists(old_name))
+        self.assert_thumbnails(old_name, False)
+
+    def test_shared_preview_is_kept(self):
+        lesson = self.create_lesson('red')
+        other = self.create_lesson('red')
+        self.assertEqual(lesson.preview.name, other.preview.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.preview = None
+            lesson.save()
+        self.assertTrue(other.preview.storage.exists(other.preview.name))
+        self.assert_thumbnails(other.preview.name, True)
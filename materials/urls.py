@@ -1,6 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet, LessonListCreateView, LessonRetrieveUpdateDestroyView
+from .views import (
+    CatalogueExportView, ChangeFeedView, CourseLessonListView, CourseViewSet, LessonBulkView,
+    LessonListCreateView, LessonRetrieveUpdateDestroyView, SearchView,
+    CourseListAsyncView, CourseDetailAsyncView, LessonListAsyncView, LessonDetailAsyncView
+)
 
 app_name = 'materials'
 
@@ -8,7 +12,18 @@ router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
 
 urlpatterns = [
+    path('courses/<int:pk>/lessons/', CourseLessonListView.as_view(), name='course-lessons'),
     path('', include(router.urls)),
     path('lessons/', LessonListCreateView.as_view(), name='lesson-list'),
     path('lessons/<int:pk>/', LessonRetrieveUpdateDestroyView.as_view(), name='lesson-detail'),
+    path('lessons/bulk/', LessonBulkView.as_view(), name='lesson-bulk'),
+    path('export/', CatalogueExportView.as_view(), name='catalogue-export'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('changes/', ChangeFeedView.as_view(), name='change-feed'),
+
+    # Асинхронные пути чтения (для запуска под ASGI)
+    path('async/courses/', CourseListAsyncView.as_view(), name='course-list-async'),
+    path('async/courses/<int:pk>/', CourseDetailAsyncView.as_view(), name='course-detail-async'),
+    path('async/lessons/', LessonListAsyncView.as_view(), name='lesson-list-async'),
+    path('async/lessons/<int:pk>/', LessonDetailAsyncView.as_view(), name='lesson-detail-async'),
 ]
\ No newline at end of file
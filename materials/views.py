@@ -1,27 +1,414 @@
-from rest_framework import viewsets, generics, permissions
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from rest_framework import viewsets, generics, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+from config.fastpath import FastListMixin
+from config.pagination import AsyncKeysetPagination
+from config.sparse import SparseFieldsetMixin
+from config.throttling import ScopedThrottlingMixin
+from . import changes, counters, deletion, search
+from .export import FORMATS, aiter_export, iter_export
+from .mixins import CachedRetrieveMixin, ConditionalGetMixin, CourseFilterMixin
 from .models import Course, Lesson
-from .serializers import CourseSerializer, LessonSerializer
+from .serializers import CourseSerializer, CourseListSerializer, LessonSerializer
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ScopedThrottlingMixin, SparseFieldsetMixin, ConditionalGetMixin, FastListMixin,
+                    CachedRetrieveMixin, viewsets.ModelViewSet):
     """ViewSet для управления курсами"""
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+    lookup_value_regex = r'\d+'
+    cache_kind = 'course'
+    expandable_fields = ('lessons',)
+    # Детальный курс сериализует все уроки - самое дорогое чтение
+    throttle_scopes = {'retrieve': 'course_detail'}
 
+    def includes_lessons(self):
+        """Нужны ли вложенные уроки: в детальном представлении всегда, в списке - по ?expand=lessons"""
+        if self.action == 'list' and 'lessons' not in self.get_expanded_fields():
+            return False
+        return self.is_field_requested('lessons')
 
-class LessonListCreateView(generics.ListCreateAPIView):
-    """Представление для получения списка уроков и создания нового урока"""
+    def get_queryset(self):
+        """Предзагрузка уроков только когда они нужны в ответе"""
+        queryset = super().get_queryset()
+        if self.includes_lessons():
+            queryset = queryset.prefetch_related('lessons')
+        return self.apply_sparse_columns(queryset)
 
-    queryset = Lesson.objects.all()
+    def get_serializer_class(self):
+        """Облегченный сериализатор для списка курсов без ?expand=lessons"""
+        if self.action == 'list' and not self.includes_lessons():
+            return CourseListSerializer
+        return super().get_serializer_class()
+
+    def get_conditional_state(self):
+        """Версия курса (или списка курсов) с учетом его уроков"""
+        if 'pk' in self.kwargs:
+            return Course.objects.filter(pk=self.kwargs['pk']).annotate(
+                lessons_updated_at=Max('lessons__updated_at'),
+            ).values_list('updated_at', 'lessons_updated_at', 'lessons_count').first()
+        courses = Course.objects.aggregate(Max('updated_at'), Count('id'))
+        lessons = Lesson.objects.visible().aggregate(Max('updated_at'), Count('id'))
+        return (*courses.values(), *lessons.values())
+
+    def destroy(self, request, *args, **kwargs):
+        """В асинхронном режиме курс скрывается сразу, а ответ 202 указывает на прогресс удаления"""
+        response = super().destroy(request, *args, **kwargs)
+        progress = getattr(self, 'deletion_progress', None)
+        if progress is None or response.status_code != status.HTTP_204_NO_CONTENT:
+            return response
+        location = reverse('materials:course-deletion-status', kwargs={'pk': progress['course']}, request=request)
+        return Response(progress, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+    def perform_destroy(self, instance):
+        if not settings.MATERIALS_ASYNC_DELETE:
+            return super().perform_destroy(instance)
+        self.deletion_progress = deletion.delete_course(instance)
+
+    @action(detail=True, methods=['get'], url_path='deletion')
+    def deletion_status(self, request, pk=None):
+        """Прогресс фонового удаления курса"""
+        progress = deletion.get_progress(int(pk))
+        if progress is None:
+            raise NotFound()
+        return Response(progress)
+
+
+class LessonListCreateView(SparseFieldsetMixin, ConditionalGetMixin, CourseFilterMixin, FastListMixin,
+                           generics.ListCreateAPIView):
+    """Представление для получения списка уроков (с фильтром ?course=) и создания нового урока"""
+
+    queryset = Lesson.objects.visible()
+    serializer_class = LessonSerializer
+    permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+
+    def get_queryset(self):
+        """Только колонки, нужные запрошенным через ?fields= полям"""
+        return self.apply_sparse_columns(super().get_queryset())
+
+    def get_conditional_state(self):
+        """Версия списка уроков"""
+        return tuple(self.filter_queryset(self.get_queryset()).aggregate(Max('updated_at'), Count('id')).values())
+
+
+class CourseLessonListView(SparseFieldsetMixin, FastListMixin, generics.ListAPIView):
+    """
+    Уроки одного курса с keyset-пагинацией по индексу (course, -created_at, -id).
+    Курс отдельно не загружается: его существование проверяется, только если первая страница пуста.
+    Без ETag: для него пришлось бы агрегировать все уроки курса на каждой странице
+    """
+
+    queryset = Lesson.objects.visible()
     serializer_class = LessonSerializer
     permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
 
+    def get_queryset(self):
+        return self.apply_sparse_columns(super().get_queryset().filter(course_id=self.kwargs['pk']))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        is_first_page = self.paginator.cursor_query_param not in request.query_params
+        if is_first_page and not response.data['results']:
+            if not Course.objects.filter(pk=self.kwargs['pk']).exists():
+                raise NotFound()
+        return response
 
-class LessonRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+
+class LessonRetrieveUpdateDestroyView(ConditionalGetMixin, CachedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     """Представление для получения, обновления и удаления урока"""
 
-    queryset = Lesson.objects.all()
+    queryset = Lesson.objects.visible()
+    serializer_class = LessonSerializer
+    permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+    cache_kind = 'lesson'
+
+    def get_conditional_state(self):
+        """Версия урока"""
+        return self.get_queryset().filter(pk=self.kwargs['pk']).values_list('updated_at').first()
+
+
+class LessonBulkView(generics.GenericAPIView):
+    """
+    Пакетное создание, обновление и удаление уроков в одной транзакции.
+    Тело запроса: {"create": [...], "update": [{"id": ..., ...}], "delete": [id, ...]} или просто список для создания.
+    """
+
+    queryset = Lesson.objects.visible()
     serializer_class = LessonSerializer
     permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+        if isinstance(data, list):
+            data = {'create': data}
+        if not isinstance(data, dict):
+            raise ValidationError({'detail': 'Expected an object with "create", "update" and "delete" lists, or a list.'})
+        create_data = data.get('create') or []
+        update_data = data.get('update') or []
+        delete_data = data.get('delete') or []
+
+        if not all(isinstance(items, list) for items in (create_data, update_data, delete_data)):
+            return Response(
+                {'detail': 'Expected lists in "create", "update" and "delete".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        total = len(create_data) + len(update_data) + len(delete_data)
+        if total > settings.MATERIALS_BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'Too many items: {total} > {settings.MATERIALS_BULK_MAX_ITEMS}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        create_serializer = self.get_serializer(data=create_data, many=True)
+        update_ids = [item.get('id') for item in update_data if isinstance(item, dict)]
+        update_serializer = self.get_serializer(
+            self.get_queryset().in_bulk(self._clean_ids(update_ids)),
+            data=update_data, many=True, partial=True
+        )
+
+        errors = {}
+        if not create_serializer.is_valid():
+            errors['create'] = create_serializer.errors
+        if not update_serializer.is_valid():
+            errors['update'] = update_serializer.errors
+
+        delete_ids = self._clean_ids(delete_data)
+        existing_ids = set(self.get_queryset().filter(pk__in=delete_ids).values_list('pk', flat=True))
+        delete_errors = [
+            {} if self._is_id(item) and item in existing_ids else {'id': ['Lesson not found.']}
+            for item in delete_data
+        ]
+        if any(delete_errors):
+            errors['delete'] = delete_errors
+
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(), counters.deferred():
+            create_serializer.save()
+            update_serializer.save()
+            self.get_queryset().filter(pk__in=delete_ids).delete()
+
+        return Response({
+            'created': create_serializer.data,
+            'updated': update_serializer.data,
+            'deleted': delete_data,
+        })
+
+    @staticmethod
+    def _is_id(value):
+        # true/false из JSON в Python - тоже int (1 и 0), но идентификатором не являются
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    @classmethod
+    def _clean_ids(cls, values):
+        """Оставляет только целочисленные идентификаторы"""
+        return [value for value in values if cls._is_id(value)]
+
+
+class CatalogueExportView(APIView):
+    """Потоковая выгрузка всего каталога (курсы с уроками) в NDJSON или CSV"""
+
+    permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+
+    def get(self, request, *args, **kwargs):
+        output_format = request.query_params.get('output', 'ndjson')
+        if output_format not in FORMATS:
+            raise ValidationError({'output': [f'Expected one of: {", ".join(FORMATS)}.']})
+
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            parsed = parse_datetime(updated_since)
+            if parsed is None:
+                raise ValidationError({'updated_since': ['Expected an ISO 8601 datetime.']})
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            updated_since = parsed
+
+        # Синхронный итератор Django под ASGI сначала целиком собирает в память
+        export = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            export(output_format, updated_since or None, context={'request': request}),
+            content_type=FORMATS[output_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="catalogue.{output_format}"'
+        return response
+
+
+class ChangeFeedView(APIView):
+    """
+    Лента изменений для синхронизации: ?token=<токен из next_token> или ?updated_since=<ISO 8601>, &limit=<размер>.
+    Первый запрос без параметров отдает весь каталог; клиент повторяет запрос с next_token, пока has_more.
+    Ответ 410 означает, что токен устарел и нужна полная синхронизация
+    """
+
+    permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', settings.CHANGE_FEED_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'limit': ['Expected an integer.']})
+        limit = min(max(limit, 1), settings.CHANGE_FEED_MAX_PAGE_SIZE)
+
+        token = request.query_params.get('token')
+        updated_since = request.query_params.get('updated_since')
+        if token:
+            try:
+                positions = changes.decode_token(token)
+            except changes.InvalidToken:
+                raise ValidationError({'token': ['Invalid continuation token.']})
+        elif updated_since:
+            parsed = parse_datetime(updated_since)
+            if parsed is None:
+                raise ValidationError({'updated_since': ['Expected an ISO 8601 datetime.']})
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            positions = changes.initial_positions(parsed)
+        else:
+            positions = changes.initial_positions()
+
+        try:
+            page = changes.get_page(
+                positions, limit, context={'request': request}, include_staff=request.user.is_staff,
+            )
+        except changes.ExpiredToken:
+            return Response(
+                {'detail': 'Token is older than the deletion history, a full resync is required.'},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(page)
+
+
+class SearchView(APIView):
+    """Полнотекстовый поиск по курсам и урокам: ?q=<запрос>&page=<номер>&page_size=<размер>"""
+
+    permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+    max_page_size = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = int(request.query_params.get('page_size', settings.REST_FRAMEWORK['PAGE_SIZE']))
+        except ValueError:
+            raise ValidationError({'page': ['Expected integers in "page" and "page_size".']})
+        page_size = min(max(page_size, 1), self.max_page_size)
+
+        # Берем на одну запись больше, чтобы узнать о следующей странице без COUNT(*)
+        results = search.search(query, page_size + 1, (page - 1) * page_size) if query else []
+        url = request.build_absolute_uri()
+        has_next = len(results) > page_size
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+            'previous': (
+                (replace_query_param(url, 'page', page - 1) if page > 2 else remove_query_param(url, 'page'))
+                if page > 1 else None
+            ),
+            'results': results[:page_size],
+        })
+
+
+class AsyncReadView(View):
+    """
+    Базовое асинхронное представление только для чтения на async ORM.
+    Под ASGI не занимает поток на время ожидания БД; изменения остаются в синхронных представлениях.
+
+    Ответы совпадают с DRF-представлениями только по полям объектов, но не целиком:
+    - в списках нет ключа previous, а курсор next - собственный (created_at|id), несовместимый с курсорами DRF;
+    - нет аутентификации, прав доступа и ограничения частоты запросов;
+    - нет ETag/Last-Modified и условных ответов 304, детальные ответы не берутся из materials.cache;
+    - не поддерживаются ?fields=, ?expand= и согласование формата, ответ всегда JSON.
+    """
+
+    http_method_names = ['get', 'head', 'options']
+    serializer_class = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            # Ошибки DRF (например, неверный курсор пагинации) в том же формате, что и у синхронных представлений
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return self.render(data, status=exc.status_code)
+
+    def render(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    def serialize(self, request, instance, many=False):
+        # Данные уже загружены (аннотации и prefetch), поэтому сериализация не обращается к БД
+        return self.serializer_class(instance, many=many, context={'request': request}).data
+
+    def not_found(self):
+        return self.render({'detail': 'Not found.'}, status=404)
+
+
+class CourseListAsyncView(AsyncReadView):
+    """Асинхронный список курсов"""
+
+    serializer_class = CourseListSerializer
+
+    async def get(self, request, *args, **kwargs):
+        courses, next_url = await AsyncKeysetPagination().paginate_queryset(request, Course.objects.all())
+        return self.render({'next': next_url, 'results': self.serialize(request, courses, many=True)})
+
+
+class CourseDetailAsyncView(AsyncReadView):
+    """Асинхронное детальное представление курса с уроками"""
+
+    serializer_class = CourseSerializer
+
+    async def get(self, request, pk, *args, **kwargs):
+        queryset = Course.objects.prefetch_related('lessons')
+        try:
+            course = await queryset.aget(pk=pk)
+        except Course.DoesNotExist:
+            return self.not_found()
+        return self.render(self.serialize(request, course))
+
+
+class LessonListAsyncView(AsyncReadView):
+    """Асинхронный список уроков (с фильтром ?course=)"""
+
+    serializer_class = LessonSerializer
+
+    async def get(self, request, *args, **kwargs):
+        queryset = Lesson.objects.visible()
+        course = request.GET.get('course')
+        if course is not None:
+            try:
+                course = int(course)
+            except ValueError:
+                return self.render({'course': ['Expected an integer.']}, status=400)
+            queryset = queryset.filter(course_id=course)
+        lessons, next_url = await AsyncKeysetPagination().paginate_queryset(request, queryset)
+        return self.render({'next': next_url, 'results': self.serialize(request, lessons, many=True)})
+
+
+class LessonDetailAsyncView(AsyncReadView):
+    """Асинхронное детальное представление урока"""
+
+    serializer_class = LessonSerializer
+
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            lesson = await Lesson.objects.visible().aget(pk=pk)
+        except Lesson.DoesNotExist:
+            return self.not_found()
+        return self.render(self.serialize(request, lesson))
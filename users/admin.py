@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
+
+from config.pagination import EstimatedCountPaginator
 from .models import User
 
 
@@ -28,8 +30,14 @@ class UserAdmin(BaseUserAdmin):
 
     list_display = ('email', 'first_name', 'last_name', 'phone', 'city', 'is_staff', 'is_active')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'city')
-    search_fields = ('email', 'first_name', 'last_name', 'phone', 'city')
+    # Поиск по началу значения использует индексы (см. миграцию 0003), поиск по подстроке - нет
+    # Подстроки в середине email или фамилии поэтому не находятся - об этом говорит подсказка под поиском
+    search_fields = ('^email', '^first_name', '^last_name', '^phone')
+    search_help_text = _('Matches the beginning of email, first name, last name or phone.')
     ordering = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     readonly_fields = ('last_login', 'date_joined')
 
     # Убираем поле username из формы
@@ -7,8 +7,9 @@ class UsersConfig(AppConfig):
     verbose_name = 'Users'
 
     def ready(self):
-        """Импорт сигналов при загрузке приложения"""
+        """Импорт сигналов и системных проверок при загрузке приложения"""
         try:
             import users.signals  # noqa: F401
         except ImportError:
-            pass
\ No newline at end of file
+            pass
+        import users.checks  # noqa: F401
\ No newline at end of file
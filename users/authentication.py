@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+
+from .cache import get_cached_user
+
+TOKEN_SALT = 'users.authentication.token'
+
+
+def make_token(user):
+    """
+    Подписанный токен пользователя. Содержит хеш сессии, зависящий от хеша пароля,
+    поэтому смена пароля отзывает все ранее выданные токены.
+    """
+    return signing.dumps({'id': user.pk, 'h': user.get_session_auth_hash()}, salt=TOKEN_SALT)
+
+
+class CachedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Аутентификация по заголовку "Authorization: Token <токен>".
+    Проверка подписи - один HMAC, пользователь берется из общего кэша users.cache,
+    поэтому хеширование пароля на каждый запрос не выполняется. Активность и хеш сессии
+    проверяются на каждом запросе: отзыв токена виден сразу во всех воркерах.
+    """
+
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        return self._load_user(token), token
+
+    def _load_user(self, token):
+        try:
+            payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.AUTH_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid or expired token.'))
+
+        user = get_cached_user(payload.get('id'))
+        if user is None or not user.is_active or not constant_time_compare(payload.get('h', ''), user.get_session_auth_hash()):
+            raise exceptions.AuthenticationFailed(_('Invalid or expired token.'))
+        return user
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import User
+
+CACHE_PREFIX = 'users:user'
+
+
+def _get_cache():
+    """Возвращает бэкенд кэша, настроенный для пользователей"""
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def _key(pk):
+    return f'{CACHE_PREFIX}:{pk}'
+
+
+def get_cached_user(pk):
+    """Пользователь по первичному ключу из кэша; None, если такого пользователя нет"""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    cache = _get_cache()
+    user = cache.get(_key(pk))
+    if user is None:
+        # Промах читаем из основной БД, чтобы не положить в кэш отстающую копию с реплики
+        user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).first()
+        if user is not None:
+            cache.set(_key(pk), user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate(pk):
+    """
+    Удаляет пользователя из кэша сразу и повторно после фиксации транзакции,
+    чтобы параллельный запрос не вернул в кэш незафиксированное старое состояние
+    """
+    cache = _get_cache()
+    cache.delete(_key(pk))
+    transaction.on_commit(lambda: cache.delete(_key(pk)))
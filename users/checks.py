@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Бэкенды, данные которых видны только текущему процессу
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Пользователи и сессии кэшируются и сбрасываются сигналами при изменении. В кэше локальной памяти
+    сброс виден только воркеру, обработавшему изменение: остальные продолжают отдавать старого пользователя
+    (заблокированного, со старым паролем) и закрытую сессию до истечения таймаута.
+    Счетчики лимитов запросов (config.throttling) в такой памяти считаются отдельно в каждом воркере,
+    и фактический лимит оказывается в число воркеров больше заданного
+    """
+    errors = []
+    aliases = {
+        'USER_CACHE_ALIAS': settings.USER_CACHE_ALIAS,
+        'SESSION_CACHE_ALIAS': settings.SESSION_CACHE_ALIAS,
+        'THROTTLE_CACHE_ALIAS': settings.THROTTLE_CACHE_ALIAS,
+    }
+    for setting, alias in aliases.items():
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_BACKENDS:
+            # Кэш лимитов настраивается своими переменными окружения (config.settings)
+            prefix = 'THROTTLE_' if setting == 'THROTTLE_CACHE_ALIAS' else ''
+            errors.append(Error(
+                f"{setting} points to the process-local cache '{alias}' ({backend}).",
+                hint=f'Use a cache shared by all workers (Redis or Memcached), e.g. via {prefix}CACHE_BACKEND '
+                     f'and {prefix}CACHE_LOCATION.',
+                id='users.E001',
+            ))
+    return errors
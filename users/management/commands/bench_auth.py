@@ -0,0 +1,48 @@
+import base64
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+
+from users.authentication import make_token
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Сравнение пропускной способности Basic-аутентификации и кэшируемых токенов"""
+
+    help = 'Benchmark requests/sec of /api/users/profile/ with Basic auth vs token auth'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        email, password = 'bench-auth@example.com', 'bench-auth-password'
+
+        # Временный пользователь создается в транзакции, которая откатывается в конце
+        with transaction.atomic():
+            user = User.objects.create_user(email, password)
+            basic = base64.b64encode(f'{email}:{password}'.encode()).decode()
+            results = {
+                'basic': self._run(client, f'Basic {basic}', options['requests']),
+                'token': self._run(client, f'Token {make_token(user)}', options['requests']),
+            }
+            transaction.set_rollback(True)
+
+        for name, rate in results.items():
+            self.stdout.write(f'{name:>6}: {rate:8.1f} req/s')
+        self.stdout.write(self.style.SUCCESS(f'speedup: {results["token"] / results["basic"]:.1f}x'))
+
+    @staticmethod
+    def _run(client, authorization, count):
+        url = '/api/users/profile/'
+        response = client.get(url, HTTP_AUTHORIZATION=authorization)
+        assert response.status_code == 200, response.content
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get(url, HTTP_AUTHORIZATION=authorization)
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+import time
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from users.models import User
+
+PROFILE_FIELDS = ('first_name', 'last_name', 'phone', 'city')
+
+
+def _init_worker():
+    """Настройка Django в дочернем процессе (нужна при запуске процессов через spawn)"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def _hash_password(password):
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    """Массовый импорт пользователей из CSV/NDJSON с параллельным хешированием паролей"""
+
+    help = 'Import users from a CSV or NDJSON file, hashing passwords across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or NDJSON file')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Input format (by extension by default)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Password hashing processes')
+        parser.add_argument('--checkpoint', help='Progress file (default: <path>.checkpoint)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        batch_size = options['batch_size']
+
+        start_row = 0 if options['restart'] else self._read_checkpoint(checkpoint)
+        if start_row:
+            self.stdout.write(f'Resuming after row {start_row}')
+
+        processed = start_row
+        created = skipped = 0
+        started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            rows = islice(self._read_rows(path, input_format), start_row, None)
+            while batch := list(islice(rows, batch_size)):
+                batch_created, batch_skipped = self._import_batch(batch, processed, pool, options['workers'])
+                processed += len(batch)
+                created += batch_created
+                skipped += batch_skipped
+                self._write_checkpoint(checkpoint, processed)
+
+                elapsed = time.monotonic() - started
+                rate = (processed - start_row) / elapsed if elapsed else 0
+                self.stdout.write(
+                    f'Processed {processed} rows: created {created}, skipped {skipped} ({rate:.0f} rows/s)'
+                )
+
+        # Контрольной точки нет, если в файле не оказалось ни одной строки для импорта
+        with suppress(FileNotFoundError):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: created {created}, skipped {skipped} in {time.monotonic() - started:.1f}s'
+        ))
+
+    def _import_batch(self, batch, first_row, pool, workers):
+        """Импорт одной порции: отбор новых email, хеширование паролей и bulk_create"""
+        candidates = {}
+        for number, row in enumerate(batch, start=first_row + 1):
+            user = self._build_user(number, row)
+            if user is None:
+                continue
+            # При повторе email внутри файла используется первая строка
+            candidates.setdefault(user.email, (user, row.get('password')))
+
+        existing = set(User.objects.filter(email__in=candidates).values_list('email', flat=True))
+        rows = [candidate for email, candidate in candidates.items() if email not in existing]
+
+        chunksize = max(1, len(rows) // (workers * 4))
+        passwords = pool.map(_hash_password, [password for _, password in rows], chunksize=chunksize)
+        users = []
+        for (user, _), password in zip(rows, passwords):
+            user.password = password
+            users.append(user)
+
+        try:
+            created = self._insert(users)
+        except DatabaseError:
+            # Ошибка одной строки не должна отменять всю порцию: повторяем вставку построчно
+            created = 0
+            for user in users:
+                try:
+                    created += self._insert([user])
+                except DatabaseError as error:
+                    self.stderr.write(f'Skipped {user.email}: {error}')
+        return created, len(batch) - created
+
+    def _build_user(self, number, row):
+        """Пользователь из строки файла или None, если строка некорректна (с предупреждением в stderr)"""
+        if not isinstance(row, dict):
+            self.stderr.write(f'Row {number}: expected an object, skipped')
+            return None
+        email = (row.get('email') or '').strip()
+        if not email:
+            return None
+        user = User(
+            email=User.objects.normalize_email(email),
+            **{field: row.get(field) or '' for field in PROFILE_FIELDS}
+        )
+        try:
+            # Пароль хешируется позже, уникальность email проверяется одним запросом на порцию
+            user.clean_fields(exclude=['password'])
+        except ValidationError as error:
+            self.stderr.write(f'Row {number}: {"; ".join(error.messages)}, skipped')
+            return None
+        return user
+
+    @staticmethod
+    def _insert(users):
+        """bulk_create с подсчетом реально вставленных строк"""
+        with transaction.atomic():
+            # ignore_conflicts защищает от гонки с параллельной регистрацией того же email,
+            # поэтому вставленными считаются только строки с нашими (уникальными из-за соли) хешами
+            User.objects.bulk_create(users, ignore_conflicts=True)
+            passwords = {user.email: user.password for user in users}
+            stored = User.objects.filter(email__in=passwords).values_list('email', 'password')
+            return sum(1 for email, password in stored if passwords[email] == password)
+
+    @staticmethod
+    def _read_rows(path, input_format):
+        with open(path, encoding='utf-8', newline='') as source:
+            if input_format == 'csv':
+                yield from csv.DictReader(source)
+                return
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Номера строк должны совпадать с контрольной точкой, поэтому строка не пропускается
+                    yield None
+
+    @staticmethod
+    def _read_checkpoint(checkpoint):
+        try:
+            with open(checkpoint, encoding='utf-8') as source:
+                return int(source.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _write_checkpoint(checkpoint, processed):
+        tmp_path = f'{checkpoint}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as target:
+            target.write(str(processed))
+        os.replace(tmp_path, checkpoint)
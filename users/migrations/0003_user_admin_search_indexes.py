@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+PREFIX_SEARCH_COLUMNS = ('email', 'first_name', 'last_name', 'phone')
+
+
+def create_prefix_search_indexes(apps, schema_editor):
+    """
+    Индексы для поиска по префиксу в админке (^поле -> UPPER(поле) LIKE 'X%'), только PostgreSQL:
+    в SQLite регистронезависимый LIKE индексы не использует
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS users_{column}_upper_prefix ON users (UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS users_{column}_upper_prefix')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_alter_user_avatar_alter_user_city_alter_user_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['city'], name='users_city_9c6023_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name', 'first_name'], name='users_last_na_fc68d4_idx'),
+        ),
+        migrations.RunPython(create_prefix_search_indexes, drop_prefix_search_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, help_text='User profile picture', null=True, storage=config.storage.ContentAddressedStorage(), upload_to='avatars/', verbose_name='avatar'),
+        ),
+    ]
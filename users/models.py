@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+from config.storage import ContentAddressedStorage
+
 
 class UserManager(BaseUserManager):
     """Менеджер для модели пользователя с email в качестве идентификатора"""
@@ -59,12 +61,17 @@ class User(AbstractUser):
 
     avatar = models.ImageField(
         _('avatar'),
-        upload_to='avatars/%Y/%m/%d/',
+        # Имя файла - хеш содержимого, каталоги по датам не нужны и мешали бы дедупликации
+        upload_to='avatars/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True,
         help_text=_('User profile picture')
     )
 
+    # Время последнего изменения для ленты изменений (materials.changes)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
     # Переопределяем поле для авторизации
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []  # Убираем email из REQUIRED_FIELDS так как он уже в USERNAME_FIELD
@@ -83,6 +90,17 @@ class User(AbstractUser):
         """Возвращает короткое имя пользователя"""
         return self.first_name if self.first_name else self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходный аватар, чтобы не пересоздавать миниатюры при каждом сохранении
+        instance._loaded_avatar = instance.__dict__.get('avatar')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_avatar = self.avatar.name
+
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
@@ -90,4 +108,8 @@ class User(AbstractUser):
         indexes = [
             models.Index(fields=['email']),
             models.Index(fields=['phone']),
+            # Фильтр по городу и поиск по фамилии в админке
+            models.Index(fields=['city']),
+            models.Index(fields=['last_name', 'first_name']),
+            models.Index(fields=['updated_at', 'id']),
         ]
\ No newline at end of file
@@ -1,16 +1,21 @@
 from rest_framework import serializers
+from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from config.sparse import DynamicFieldsSerializerMixin
+from config.thumbnails import ThumbnailsField
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для чтения данных пользователя"""
 
+    avatar_thumbnails = ThumbnailsField(source='avatar')
+
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name',
-            'phone', 'city', 'avatar', 'is_staff',
+            'phone', 'city', 'avatar', 'avatar_thumbnails', 'is_staff',
             'is_active', 'date_joined', 'last_login'
         ]
         read_only_fields = [
@@ -73,4 +78,18 @@ class PasswordChangeSerializer(serializers.Serializer):
         """Проверка совпадения новых паролей"""
         if attrs['new_password'] != attrs['new_password2']:
             raise serializers.ValidationError({"new_password": "New password fields didn't match."})
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    """Сериализатор для получения токена по email и паролю"""
+    email = serializers.EmailField(required=True)
+    password = serializers.CharField(required=True, write_only=True)
+
+    def validate(self, attrs):
+        """Проверка учетных данных"""
+        user = authenticate(self.context.get('request'), email=attrs['email'], password=attrs['password'])
+        if user is None:
+            raise serializers.ValidationError({"detail": "Invalid email or password."})
+        attrs['user'] = user
+        return attrs
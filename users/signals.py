@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.thumbnails import schedule_thumbnails
+from materials import changes
+from . import cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def generate_avatar_thumbnails(sender, instance, created, update_fields=None, **kwargs):
+    """Фоновая генерация миниатюр аватара, только если он сменился (а не при входе, смене пароля и т.п.)"""
+    if update_fields is not None and 'avatar' not in update_fields:
+        return
+    if not created and instance.avatar.name == getattr(instance, '_loaded_avatar', None):
+        return
+    schedule_thumbnails(instance.avatar)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Сброс закэшированного пользователя (сессии и токены берут его из кэша)"""
+    cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def record_deletion(sender, instance, **kwargs):
+    """Запись об удалении пользователя для ленты изменений (materials.changes)"""
+    changes.record_deletion(instance)
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .authentication import make_token
+from .models import User
+
+
+class CachedProfileTests(APITestCase):
+    """Повторный запрос профиля берет пользователя и сессию из кэша и не обращается к БД"""
+
+    def setUp(self):
+        caches[settings.USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user('profile@example.com', 'profile-password')
+        self.url = reverse('users:user-profile')
+
+    def assert_warm_profile_without_queries(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_token(self):
+        self.assert_warm_profile_without_queries(authorization=f'Token {make_token(self.user)}')
+
+    def test_session(self):
+        self.client.force_login(self.user)
+        self.assert_warm_profile_without_queries()
+
+    def test_deactivated_user_is_rejected(self):
+        token = make_token(self.user)
+        self.assertEqual(self.client.get(self.url, headers={'authorization': f'Token {token}'}).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, headers={'authorization': f'Token {token}'}).status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    """Импорт считает только реально созданных пользователей и пропускает некорректные строки"""
+
+    def import_rows(self, lines):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.ndjson')
+            with open(path, 'w', encoding='utf-8') as target:
+                target.write('\n'.join(lines))
+            stdout, stderr = StringIO(), StringIO()
+            call_command('import_users', path, workers=1, batch_size=10, stdout=stdout, stderr=stderr)
+            self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_created_count_and_invalid_rows(self):
+        User.objects.create_user('existing@example.com', 'password')
+        stdout, stderr = self.import_rows([
+            json.dumps({'email': 'new@example.com', 'password': 'secret', 'city': 'Moscow'}),
+            json.dumps({'email': 'existing@example.com'}),
+            json.dumps({'email': 'not-an-email'}),
+            json.dumps({'email': 'phone@example.com', 'phone': '1' * 50}),
+            '{broken',
+            json.dumps(['list@example.com']),
+            json.dumps({'email': 'second@example.com'}),
+        ])
+        self.assertIn('Done: created 2, skipped 5', stdout)
+        self.assertEqual(stderr.count('skipped'), 4)
+        self.assertEqual(
+            set(User.objects.values_list('email', flat=True)),
+            {'existing@example.com', 'new@example.com', 'second@example.com'},
+        )
+        self.assertTrue(User.objects.get(email='new@example.com').check_password('secret'))
@@ -2,18 +2,34 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import update_session_auth_hash
+from config.fastpath import FastListMixin
+from config.pagination import EmailKeysetPagination
+from config.sparse import SparseFieldsetMixin
+from config.throttling import ScopedThrottlingMixin
+from .authentication import make_token
 from .models import User
 from .serializers import (
     UserSerializer, UserCreateSerializer,
-    UserUpdateSerializer, PasswordChangeSerializer
+    UserUpdateSerializer, PasswordChangeSerializer,
+    TokenObtainSerializer
 )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ScopedThrottlingMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet для управления пользователями"""
 
     queryset = User.objects.all().order_by('email')
+    pagination_class = EmailKeysetPagination
     permission_classes = [permissions.AllowAny]  # Временно открыт доступ для всех
+    # Действия с хешированием пароля
+    throttle_scopes = {'change_password': 'password', 'token': 'password'}
+
+    def get_queryset(self):
+        """Только колонки, нужные запрошенным через ?fields= полям"""
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve']:
+            queryset = self.apply_sparse_columns(queryset)
+        return queryset
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия"""
@@ -23,11 +39,13 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserUpdateSerializer
         elif self.action == 'change_password':
             return PasswordChangeSerializer
+        elif self.action == 'token':
+            return TokenObtainSerializer
         return UserSerializer
 
     def get_permissions(self):
         """Настройка разрешений для разных действий"""
-        if self.action == 'create':
+        if self.action in ['create', 'token']:
             permission_classes = [permissions.AllowAny]
         elif self.action == 'list':
             permission_classes = [permissions.IsAdminUser]
@@ -53,14 +71,25 @@ class UserViewSet(viewsets.ModelViewSet):
             user.set_password(serializer.validated_data['new_password'])
             user.save()
 
+            data = {"detail": "Password changed successfully."}
+
             # Обновление сессии, если пользователь меняет свой пароль
             if user == request.user:
                 update_session_auth_hash(request, user)
+                # Старые токены отозваны вместе со сменой хеша пароля, выдаем новый
+                data["token"] = make_token(user)
 
-            return Response({"detail": "Password changed successfully."})
+            return Response(data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='token')
+    def token(self, request):
+        """Получение токена API по email и паролю"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"token": make_token(serializer.validated_data['user'])})
+
     @action(detail=False, methods=['get'], url_path='profile')
     def profile(self, request):
         """Получение профиля текущего пользователя"""